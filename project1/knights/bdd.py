@@ -0,0 +1,239 @@
+from collections import Counter
+
+from logic import *
+
+
+class BDD():
+    """
+    Reduced ordered binary decision diagram over a fixed variable order.
+
+    Nodes are integers: 0 and 1 are the false and true terminals, and
+    every other node is an index into `self.nodes`, which stores
+    (level, low, high) triples. A unique table keeps the diagram reduced
+    and a computed table caches the results of `ite`, so each distinct
+    subproblem is only solved once for the lifetime of the manager.
+    """
+
+    FALSE = 0
+    TRUE = 1
+
+    def __init__(self, order):
+        """Create a new manager for symbol names in the given order."""
+        self.order = list(order)
+        self.level = {name: i for i, name in enumerate(self.order)}
+
+        # Terminals sit below every variable
+        terminal = len(self.order)
+        self.nodes = [(terminal, None, None), (terminal, None, None)]
+        self.unique = dict()
+        self.computed = dict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def node(self, level, low, high):
+        """Return the node testing `level`, creating it only if needed."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        if key not in self.unique:
+            self.unique[key] = len(self.nodes)
+            self.nodes.append(key)
+        return self.unique[key]
+
+    def var(self, name):
+        """Return the node for a single symbol."""
+        if name not in self.level:
+            raise Exception(f"variable {name} not in order")
+        return self.node(self.level[name], BDD.FALSE, BDD.TRUE)
+
+    def cofactors(self, u, level):
+        """Return the (low, high) cofactors of `u` with respect to `level`."""
+        u_level, low, high = self.nodes[u]
+        if u_level != level:
+            return u, u
+        return low, high
+
+    def ite(self, f, g, h):
+        """Return the node for "if f then g else h"."""
+
+        # Terminal cases
+        if f == BDD.TRUE:
+            return g
+        if f == BDD.FALSE:
+            return h
+        if g == h:
+            return g
+        if g == BDD.TRUE and h == BDD.FALSE:
+            return f
+
+        key = (f, g, h)
+        if key in self.computed:
+            self.cache_hits += 1
+            return self.computed[key]
+        self.cache_misses += 1
+
+        # Split on the topmost variable of the three operands
+        level = min(self.nodes[f][0], self.nodes[g][0], self.nodes[h][0])
+        f_low, f_high = self.cofactors(f, level)
+        g_low, g_high = self.cofactors(g, level)
+        h_low, h_high = self.cofactors(h, level)
+        result = self.node(
+            level,
+            self.ite(f_low, g_low, h_low),
+            self.ite(f_high, g_high, h_high)
+        )
+        self.computed[key] = result
+        return result
+
+    def negate(self, u):
+        return self.ite(u, BDD.FALSE, BDD.TRUE)
+
+    def conjoin(self, u, v):
+        return self.ite(u, v, BDD.FALSE)
+
+    def disjoin(self, u, v):
+        return self.ite(u, BDD.TRUE, v)
+
+    def implies(self, u, v):
+        return self.ite(u, v, BDD.TRUE)
+
+    def equivalent(self, u, v):
+        return self.ite(u, v, self.negate(v))
+
+    def compile(self, sentence):
+        """Return the node equivalent to a logical sentence."""
+        Sentence.validate(sentence)
+        if isinstance(sentence, Symbol):
+            return self.var(sentence.name)
+        if isinstance(sentence, Not):
+            return self.negate(self.compile(sentence.operand))
+        if isinstance(sentence, And):
+            result = BDD.TRUE
+            for conjunct in sentence.conjuncts:
+                result = self.conjoin(result, self.compile(conjunct))
+            return result
+        if isinstance(sentence, Or):
+            result = BDD.FALSE
+            for disjunct in sentence.disjuncts:
+                result = self.disjoin(result, self.compile(disjunct))
+            return result
+        if isinstance(sentence, Implication):
+            return self.implies(self.compile(sentence.antecedent),
+                                self.compile(sentence.consequent))
+        if isinstance(sentence, Biconditional):
+            return self.equivalent(self.compile(sentence.left),
+                                   self.compile(sentence.right))
+        raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+    def entails(self, knowledge, query):
+        """Checks if node `knowledge` entails node `query`."""
+        return self.implies(knowledge, query) == BDD.TRUE
+
+    def restrict(self, u, model):
+        """
+        Return `u` conditioned on a partial model, a dictionary mapping
+        symbol names to truth values.
+        """
+        fixed = {self.level[name]: bool(value)
+                 for name, value in model.items() if name in self.level}
+        memo = dict()
+
+        def walk(u):
+            if u <= BDD.TRUE:
+                return u
+            if u not in memo:
+                level, low, high = self.nodes[u]
+                if level in fixed:
+                    memo[u] = walk(high if fixed[level] else low)
+                else:
+                    memo[u] = self.node(level, walk(low), walk(high))
+            return memo[u]
+
+        return walk(u)
+
+    def count(self, u):
+        """
+        Return the number of models of `u` over every variable in the order.
+        """
+        memo = {BDD.FALSE: 0, BDD.TRUE: 1}
+
+        def walk(u):
+            if u not in memo:
+                level, low, high = self.nodes[u]
+                memo[u] = (
+                    walk(low) * 2 ** (self.nodes[low][0] - level - 1)
+                    + walk(high) * 2 ** (self.nodes[high][0] - level - 1)
+                )
+            return memo[u]
+
+        return walk(u) * 2 ** self.nodes[u][0]
+
+    def size(self, u):
+        """Return the number of internal nodes reachable from `u`."""
+        seen = set()
+        frontier = [u]
+        while frontier:
+            u = frontier.pop()
+            if u <= BDD.TRUE or u in seen:
+                continue
+            seen.add(u)
+            frontier.extend(self.nodes[u][1:])
+        return len(seen)
+
+    def stats(self):
+        """Return a dictionary describing the state of the manager."""
+        return {
+            "variables": len(self.order),
+            "nodes": len(self.nodes) - 2,
+            "computed": len(self.computed),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+def variable_order(sentences, heuristic="appearance"):
+    """
+    Return a list of symbol names to use as a BDD variable order.
+
+    "appearance" orders symbols by first occurrence in a depth-first walk,
+    which keeps symbols that appear together close in the order.
+    "frequency" puts the most often mentioned symbols first.
+    "alphabetical" simply sorts the names.
+    """
+    occurrences = []
+
+    def walk(sentence):
+        if isinstance(sentence, Symbol):
+            occurrences.append(sentence.name)
+        elif isinstance(sentence, Not):
+            walk(sentence.operand)
+        elif isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                walk(conjunct)
+        elif isinstance(sentence, Or):
+            for disjunct in sentence.disjuncts:
+                walk(disjunct)
+        elif isinstance(sentence, Implication):
+            walk(sentence.antecedent)
+            walk(sentence.consequent)
+        elif isinstance(sentence, Biconditional):
+            walk(sentence.left)
+            walk(sentence.right)
+
+    for sentence in sentences:
+        walk(sentence)
+
+    if heuristic == "appearance":
+        return list(dict.fromkeys(occurrences))
+    if heuristic == "frequency":
+        counts = Counter(occurrences)
+        return sorted(dict.fromkeys(occurrences), key=lambda name: -counts[name])
+    if heuristic == "alphabetical":
+        return sorted(set(occurrences))
+    raise ValueError(f"unknown ordering heuristic {heuristic}")
+
+
+def model_check_bdd(knowledge, query, heuristic="appearance"):
+    """Checks if knowledge base entails query by compiling both to a BDD."""
+    bdd = BDD(variable_order([knowledge, query], heuristic))
+    return bdd.entails(bdd.compile(knowledge), bdd.compile(query))
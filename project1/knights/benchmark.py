@@ -0,0 +1,140 @@
+import random
+import sys
+import time
+
+from logic import *
+from bdd import model_check_bdd
+from knowledge import KnowledgeBase, model_check_dpll
+
+# Largest number of symbols to try with backends that can blow up
+LIMITS = {
+    "model_check": 16,
+    "parallel": 16,
+    "bdd": 32,
+}
+
+
+def random_knights(n, seed=None):
+    """
+    Return a random knights and knaves puzzle with `n` inhabitants.
+
+    Each inhabitant makes one statement about the kinds of up to three
+    others. Return a tuple (knowledge, symbols) where `symbols` is the
+    list of every "is a Knight" and "is a Knave" symbol.
+    """
+    rng = random.Random(seed)
+    knights = [Symbol(f"P{i} is a Knight") for i in range(n)]
+    knaves = [Symbol(f"P{i} is a Knave") for i in range(n)]
+
+    def claim():
+        """Return a random claim about the kind of one inhabitant."""
+        i = rng.randrange(n)
+        return rng.choice([knights[i], knaves[i]])
+
+    knowledge = And()
+    for i in range(n):
+        # knowledge about the game
+        knowledge.add(Not(And(knights[i], knaves[i])))
+        knowledge.add(Or(knights[i], knaves[i]))
+
+        # knowledge about the puzzle
+        claims = [claim() for _ in range(rng.randint(1, 3))]
+        statement = rng.choice([
+            lambda: claims[0],
+            lambda: Not(claims[0]),
+            lambda: And(*claims),
+            lambda: Or(*claims),
+            lambda: Implication(claims[0], claims[-1]),
+        ])()
+        knowledge.add(Implication(knights[i], statement))
+        knowledge.add(Implication(knaves[i], Not(statement)))
+    return knowledge, knights + knaves
+
+
+def random_cnf(n, m, k=3, seed=None):
+    """
+    Return a random k-CNF formula with `n` symbols and `m` clauses.
+
+    Return a tuple (knowledge, symbols) where `symbols` is the list of
+    every symbol.
+    """
+    rng = random.Random(seed)
+    symbols = [Symbol(f"p{i}") for i in range(n)]
+    knowledge = And()
+    for _ in range(m):
+        literals = [
+            symbol if rng.random() < 0.5 else Not(symbol)
+            for symbol in rng.sample(symbols, min(k, n))
+        ]
+        knowledge.add(Or(*literals))
+    return knowledge, symbols
+
+
+def each(check):
+    """Return a backend that answers every query with `check` separately."""
+    return lambda knowledge, queries: [
+        check(knowledge, query) for query in queries
+    ]
+
+
+def incremental(knowledge, queries):
+    """Answers every query with one `KnowledgeBase` built from knowledge."""
+    kb = KnowledgeBase(knowledge)
+    return [kb.ask(query) for query in queries]
+
+
+BACKENDS = {
+    "model_check": each(model_check),
+    "parallel": each(model_check_parallel),
+    "bdd": each(model_check_bdd),
+    "dpll": each(model_check_dpll),
+    "incremental": incremental,
+}
+
+
+def benchmark(knowledge, symbols):
+    """
+    Time every backend answering whether knowledge entails each symbol.
+
+    Return a dictionary mapping backend names to (seconds, answers), and
+    raise an exception if any two backends disagree.
+    """
+    results = dict()
+    size = len(knowledge.symbols())
+    for name, backend in BACKENDS.items():
+        if size > LIMITS.get(name, size):
+            continue
+        start = time.perf_counter()
+        answers = backend(knowledge, symbols)
+        results[name] = (time.perf_counter() - start, answers)
+
+    reference = next(iter(results.values()))[1]
+    for name, (_, answers) in results.items():
+        if answers != reference:
+            raise Exception(f"{name} disagrees with other backends")
+    return results
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("knights", "cnf"):
+        sys.exit("Usage: python benchmark.py knights|cnf size [size ...]")
+    kind = sys.argv[1]
+
+    for size in map(int, sys.argv[2:]):
+        if kind == "knights":
+            knowledge, symbols = random_knights(size, seed=size)
+        else:
+            # about 4.26 clauses per symbol is the hardest 3-SAT region
+            knowledge, symbols = random_cnf(size, int(size * 4.26), seed=size)
+
+        # The text form must round trip through the parser
+        if parse(knowledge.formula()).formula() != knowledge.formula():
+            raise Exception("formula does not round trip through parser")
+
+        print(f"{kind} size {size} ({len(knowledge.symbols())} symbols)")
+        for name, (seconds, answers) in benchmark(knowledge, symbols).items():
+            print(f"  {name}: {seconds:.4f}s, {sum(answers)} entailed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+from logic import *
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that can be told and retracted sentences one at a time.
+
+    Every sentence is converted to clauses once when it is told. Queries
+    are answered by refutation using only the sentences connected to the
+    query through shared symbols, and both answers and satisfiability of
+    those connected components are cached. Telling or retracting a
+    sentence only invalidates cached answers and satisfiability whose
+    component mentions one of that sentence's symbols, along with the
+    cached consistency of the whole knowledge base.
+    """
+
+    def __init__(self, *sentences):
+        """Create a knowledge base, splitting top-level conjunctions."""
+        self.sentences = dict()
+        self.answers = dict()
+        self.satisfiable = dict()
+
+        # Map from each symbol to the sentences that mention it
+        self.mentions = dict()
+
+        # Whether the knowledge base is consistent, or None if not known
+        self.is_consistent = None
+        self.hits = 0
+        self.misses = 0
+        for sentence in sentences:
+            if isinstance(sentence, And):
+                self.tell(*sentence.conjuncts)
+            else:
+                self.tell(sentence)
+
+    def __contains__(self, sentence):
+        return sentence in self.sentences
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def knowledge(self):
+        """Return the whole knowledge base as a single sentence."""
+        return And(*self.sentences)
+
+    def tell(self, *sentences):
+        """Add sentences to the knowledge base."""
+        for sentence in sentences:
+            Sentence.validate(sentence)
+            if sentence in self.sentences:
+                continue
+            cnf = clauses(sentence)
+            self.sentences[sentence] = cnf
+            symbols = clause_symbols(cnf)
+            for symbol in symbols:
+                self.mentions.setdefault(symbol, set()).add(sentence)
+            self.invalidate(symbols)
+
+    def retract(self, *sentences):
+        """Remove sentences from the knowledge base."""
+        for sentence in sentences:
+            if sentence not in self.sentences:
+                raise KeyError(f"{sentence} not in knowledge base")
+            symbols = clause_symbols(self.sentences.pop(sentence))
+            for symbol in symbols:
+                self.mentions[symbol].discard(sentence)
+                if not self.mentions[symbol]:
+                    del self.mentions[symbol]
+            self.invalidate(symbols)
+
+    def invalidate(self, symbols):
+        """Forget cached results that depend on any of `symbols`."""
+        self.is_consistent = None
+        self.answers = {
+            query: (answer, component)
+            for query, (answer, component) in self.answers.items()
+            if not component & symbols
+        }
+        self.satisfiable = {
+            key: (result, component)
+            for key, (result, component) in self.satisfiable.items()
+            if not component & symbols
+        }
+
+    def component(self, symbols):
+        """
+        Return the sentences reachable from `symbols` through shared symbols,
+        along with every symbol they mention.
+        """
+        symbols = set(symbols)
+        frontier = list(symbols)
+        found = []
+        seen = set()
+        while frontier:
+            for sentence in self.mentions.get(frontier.pop(), ()):
+                if sentence in seen:
+                    continue
+                seen.add(sentence)
+                found.append(sentence)
+                for symbol in clause_symbols(self.sentences[sentence]):
+                    if symbol not in symbols:
+                        symbols.add(symbol)
+                        frontier.append(symbol)
+        return found, symbols
+
+    def consistent(self):
+        """Checks that every connected component of the knowledge base is satisfiable."""
+        if self.is_consistent is not None:
+            return self.is_consistent
+        self.is_consistent = True
+        unseen = set(self.sentences)
+        while unseen:
+            sentence = unseen.pop()
+            found, component = self.component(
+                clause_symbols(self.sentences[sentence])
+            )
+            key = frozenset(found) or frozenset([sentence])
+            unseen -= key
+            if key not in self.satisfiable:
+                self.satisfiable[key] = (
+                    satisfiable(set().union(*(self.sentences[s] for s in key))),
+                    component,
+                )
+            if not self.satisfiable[key][0]:
+                self.is_consistent = False
+                break
+        return self.is_consistent
+
+    def ask(self, query):
+        """Checks if the knowledge base entails query."""
+        Sentence.validate(query)
+
+        # A cached answer holds while the knowledge base is known consistent
+        if query in self.answers and self.is_consistent:
+            self.hits += 1
+            return self.answers[query][0]
+
+        # An inconsistent knowledge base entails everything
+        if not self.consistent():
+            return True
+        if query in self.answers:
+            self.hits += 1
+            return self.answers[query][0]
+        self.misses += 1
+
+        # Entailed if knowledge and the negated query cannot both hold
+        negated = clauses(query, positive=False)
+        found, component = self.component(clause_symbols(negated))
+        cnf = set(negated).union(*(self.sentences[s] for s in found))
+        answer = not satisfiable(cnf)
+        self.answers[query] = (answer, component)
+        return answer
+
+
+def clauses(sentence, positive=True):
+    """
+    Return a set of clauses equivalent to `sentence`, or to its negation
+    if `positive` is False.
+
+    Each clause is a frozenset of (symbol name, truth value) literals.
+    """
+    if isinstance(sentence, Symbol):
+        return {frozenset([(sentence.name, positive)])}
+    if isinstance(sentence, Not):
+        return clauses(sentence.operand, not positive)
+    if isinstance(sentence, And):
+        parts = [clauses(conjunct, positive) for conjunct in sentence.conjuncts]
+        return conjoin(parts) if positive else disjoin(parts)
+    if isinstance(sentence, Or):
+        parts = [clauses(disjunct, positive) for disjunct in sentence.disjuncts]
+        return disjoin(parts) if positive else conjoin(parts)
+    if isinstance(sentence, Implication):
+        if positive:
+            return disjoin([clauses(sentence.antecedent, False),
+                            clauses(sentence.consequent, True)])
+        return conjoin([clauses(sentence.antecedent, True),
+                        clauses(sentence.consequent, False)])
+    if isinstance(sentence, Biconditional):
+        left, right = sentence.left, sentence.right
+        return conjoin([
+            disjoin([clauses(left, not positive), clauses(right, True)]),
+            disjoin([clauses(left, positive), clauses(right, False)]),
+        ])
+    raise TypeError(f"cannot convert {type(sentence).__name__}")
+
+
+def conjoin(parts):
+    """Return the clauses of the conjunction of several clause sets."""
+    return set().union(*parts)
+
+
+def disjoin(parts):
+    """Return the clauses of the disjunction of several clause sets."""
+    result = {frozenset()}
+    for part in parts:
+        result = {
+            a | b for a in result for b in part
+            if not any((name, not value) in a for name, value in b)
+        }
+    return result
+
+
+def clause_symbols(cnf):
+    """Return the set of symbol names mentioned in a set of clauses."""
+    return {name for clause in cnf for name, _ in clause}
+
+
+def satisfiable(cnf, model=None):
+    """
+    Checks if a set of clauses has a satisfying model, using DPLL search
+    with unit propagation.
+
+    Clauses are indexed by the symbols they mention, so assigning a unit
+    literal only rechecks the clauses that mention its symbol.
+    """
+    model = dict(model or {})
+    cnf = [tuple(clause) for clause in cnf]
+    occurrences = dict()
+    for i, clause in enumerate(cnf):
+        for name, _ in clause:
+            occurrences.setdefault(name, []).append(i)
+
+    # Propagate units until every clause has been checked since its
+    # last symbol was assigned; a conflict leaves a clause with no literals
+    queue = list(range(len(cnf)))
+    while queue:
+        clause = cnf[queue.pop()]
+        if any(model.get(name) is value for name, value in clause):
+            continue
+        remaining = [(name, value) for name, value in clause
+                     if name not in model]
+        if not remaining:
+            return False
+        if len(remaining) == 1:
+            name, value = remaining[0]
+            model[name] = value
+            queue.extend(occurrences[name])
+
+    simplified = [
+        [(name, value) for name, value in clause if name not in model]
+        for clause in cnf
+        if not any(model.get(name) is value for name, value in clause)
+    ]
+    if not simplified:
+        return True
+
+    # Branch on a symbol from the shortest remaining clause
+    name = min(simplified, key=len)[0][0]
+    return (satisfiable(simplified, {**model, name: True})
+            or satisfiable(simplified, {**model, name: False}))
+
+
+def model_check_dpll(knowledge, query):
+    """Checks if knowledge base entails query by refutation with DPLL."""
+    return not satisfiable(clauses(knowledge) | clauses(query, positive=False))
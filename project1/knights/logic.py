@@ -1,4 +1,7 @@
 import itertools
+import multiprocessing
+import os
+import re
 
 
 class Sentence():
@@ -217,14 +220,86 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
+def parse(formula):
+    """
+    Returns the logical sentence written by `Sentence.formula`.
+
+    Operators bind from tightest to loosest as ¬, ∧, ∨, => and <=>, with
+    => and <=> grouping to the right. Any other run of text between
+    operators and parentheses is a symbol name.
+    """
+    tokens = [token.strip() for token in re.findall(
+        r"<=>|=>|¬|∧|∨|\(|\)|[^¬∧∨()<=]+", formula
+    ) if token.strip()]
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take(expected=None):
+        nonlocal position
+        token = peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError(f"expected {expected or 'symbol'}, got {token}")
+        position += 1
+        return token
+
+    def biconditional():
+        left = implication()
+        if peek() == "<=>":
+            take("<=>")
+            return Biconditional(left, biconditional())
+        return left
+
+    def implication():
+        antecedent = disjunction()
+        if peek() == "=>":
+            take("=>")
+            return Implication(antecedent, implication())
+        return antecedent
+
+    def disjunction():
+        disjuncts = [conjunction()]
+        while peek() == "∨":
+            take("∨")
+            disjuncts.append(conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction():
+        conjuncts = [negation()]
+        while peek() == "∧":
+            take("∧")
+            conjuncts.append(negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation():
+        if peek() == "¬":
+            take("¬")
+            return Not(negation())
+        if peek() == "(":
+            take("(")
+            sentence = biconditional()
+            take(")")
+            return sentence
+        name = take()
+        if name in ("<=>", "=>", "∧", "∨", ")"):
+            raise ValueError(f"expected symbol, got {name}")
+        return Symbol(name)
+
+    sentence = biconditional()
+    if peek() is not None:
+        raise ValueError(f"unexpected {peek()}")
+    return sentence
+
+
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
@@ -261,3 +336,54 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_parallel(knowledge, query, k=None, processes=None):
+    """
+    Checks if knowledge base entails query, splitting the model space
+    across a pool of worker processes.
+
+    The first `k` symbols are fixed to every combination of truth values,
+    giving 2^k partitions that are checked independently. Returns False as
+    soon as any partition contains a model where knowledge holds and query
+    does not; the result is always the same as `model_check`.
+    """
+
+    # Get all symbols in both knowledge and query, in a stable order
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # By default use a few partitions per worker so work stays balanced
+    if k is None:
+        workers = processes or os.cpu_count() or 1
+        k = workers.bit_length() + 2
+    k = max(0, min(k, len(symbols)))
+    fixed, remaining = symbols[:k], symbols[k:]
+
+    partitions = (
+        (knowledge, query, remaining, dict(zip(fixed, values)))
+        for values in itertools.product((True, False), repeat=k)
+    )
+
+    # Stop every worker as soon as a counter-model is found
+    with multiprocessing.Pool(processes) as pool:
+        for entailed in pool.imap_unordered(check_partition, partitions):
+            if not entailed:
+                pool.terminate()
+                return False
+    return True
+
+
+def check_partition(partition):
+    """
+    Checks if knowledge base entails query in every model that extends
+    the partial model of a partition.
+
+    `partition` is a tuple (knowledge, query, symbols, model) where `model`
+    assigns the fixed symbols and `symbols` lists the ones left to enumerate.
+    """
+    knowledge, query, symbols, model = partition
+    for values in itertools.product((True, False), repeat=len(symbols)):
+        model.update(zip(symbols, values))
+        if knowledge.evaluate(model) and not query.evaluate(model):
+            return False
+    return True
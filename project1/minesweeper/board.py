@@ -0,0 +1,103 @@
+import random
+
+import numpy as np
+from scipy import ndimage
+
+from minesweeper import Minesweeper
+
+
+class ArrayMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation backed by NumPy arrays, for large boards
+
+    Mines are placed with a single random permutation of the cells and the
+    number of nearby mines is computed for every cell at once when the
+    board is created, so `nearby_mines` is a lookup, as are the regions
+    uncovered together by `reveal`.
+    """
+
+    def __init__(self, height=8, width=8, mines=8):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+
+        # Add mines randomly, seeded from `random` so games are repeatable
+        rng = np.random.default_rng(random.getrandbits(64))
+        positions = rng.permutation(height * width)[:mines]
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[positions] = True
+        rows, columns = np.divmod(positions, width)
+        self.mines = set(zip(rows.tolist(), columns.tolist()))
+
+        # Count mines in each 3x3 neighborhood, not including the cell
+        self.counts = neighborhood_sum(self.board) - self.board
+
+        # Label each connected region of cells with no nearby mines, which
+        # are uncovered together, and find the bounding box of each
+        self.labels, _ = ndimage.label(
+            (self.counts == 0) & ~self.board, structure=np.ones((3, 3))
+        )
+        self.regions = ndimage.find_objects(self.labels)
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.board[i, j])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return int(self.counts[i, j])
+
+    def reveal(self, cell):
+        """
+        Returns a dictionary mapping every cell that would be uncovered by
+        clicking on `cell` to its number of nearby mines.
+
+        Clicking on a cell with no nearby mines also uncovers its neighbors,
+        so the whole connected region of such cells is uncovered together
+        with its border. Regions are labeled once when the board is created,
+        so only the bounding box of the clicked region is looked at here.
+        """
+        i, j = cell
+        if self.board[i, j]:
+            raise ValueError(f"{cell} is a mine")
+
+        label = self.labels[i, j]
+        if label == 0:
+            return {cell: int(self.counts[i, j])}
+
+        # Bounding box of the region grown by one cell for its border
+        rows, columns = self.regions[label - 1]
+        top, left = max(rows.start - 1, 0), max(columns.start - 1, 0)
+        window = (slice(top, rows.stop + 1), slice(left, columns.stop + 1))
+        region = self.labels[window] == label
+        region = (neighborhood_sum(region) > 0) & ~self.board[window]
+
+        rows, columns = np.nonzero(region)
+        counts = self.counts[window][rows, columns]
+        return dict(zip(
+            zip((rows + top).tolist(), (columns + left).tolist()),
+            counts.tolist()
+        ))
+
+
+def neighborhood_sum(array):
+    """
+    Returns an array where each entry is the sum of `array` over the 3x3
+    block centered on it, treating cells outside the board as zero.
+    """
+    padded = np.pad(array.astype(np.int8), 1)
+    height, width = array.shape
+    total = np.zeros((height, width), dtype=np.int8)
+    for di in range(3):
+        for dj in range(3):
+            total += padded[di:di + height, dj:dj + width]
+    return total
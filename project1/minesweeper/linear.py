@@ -0,0 +1,210 @@
+from fractions import Fraction
+
+from minesweeper import MinesweeperAI
+
+
+class LinearSystem():
+    """
+    System of linear equations over cells that are each 0 (safe) or 1 (mine)
+
+    Every sentence is an equation saying its cells sum to its count. The
+    equations are kept in reduced row echelon form as sparse rows, one
+    for each pivot cell, and are updated in place as equations are added
+    and cells become known, so each new sentence only costs elimination
+    against the rows it shares cells with.
+    """
+
+    def __init__(self):
+
+        # Map from pivot cell to [coefficients, right-hand side]
+        self.rows = dict()
+
+        # Map from each cell to the pivots of rows that mention it
+        self.columns = dict()
+
+        # Cells whose values are known
+        self.known = dict()
+
+        # Pivots of rows changed since the last call to `deduce`
+        self.dirty = set()
+
+    def add(self, cells, count):
+        """
+        Adds the equation that `cells` contain `count` mines.
+        """
+        row = dict()
+        rhs = Fraction(count)
+        for cell in cells:
+            if cell in self.known:
+                rhs -= self.known[cell]
+            else:
+                row[cell] = Fraction(1)
+        self.insert(row, rhs)
+
+    def assign(self, cell, value):
+        """
+        Substitutes the known value of a cell into every row.
+        """
+        if cell in self.known:
+            return
+        self.known[cell] = value
+
+        # a pivot row loses its pivot and is added again without it
+        if cell in self.rows:
+            self.detach(cell)
+            row, rhs = self.rows.pop(cell)
+            del row[cell]
+            self.insert(row, rhs - value)
+            return
+
+        for pivot in self.columns.pop(cell, ()):
+            coefficient = self.rows[pivot][0].pop(cell)
+            self.rows[pivot][1] -= coefficient * value
+            self.dirty.add(pivot)
+
+    def insert(self, row, rhs):
+        """
+        Reduces a row against the existing rows and, if anything is left,
+        adds it with a new pivot, eliminating that pivot from other rows.
+        """
+        for pivot in [cell for cell in row if cell in self.rows]:
+            coefficient = row[pivot]
+            pivot_row, pivot_rhs = self.rows[pivot]
+            combine(row, pivot_row, -coefficient)
+            rhs -= coefficient * pivot_rhs
+
+        # an empty row is redundant (or contradicts earlier knowledge)
+        if not row:
+            return
+
+        pivot = min(row)
+        scale = row[pivot]
+        row = {cell: value / scale for cell, value in row.items()}
+        rhs /= scale
+
+        for other in list(self.columns.get(pivot, ())):
+            other_row = self.rows[other]
+            coefficient = other_row[0][pivot]
+            self.detach(other)
+            combine(other_row[0], row, -coefficient)
+            other_row[1] -= coefficient * rhs
+            self.attach(other)
+            self.dirty.add(other)
+
+        self.rows[pivot] = [row, rhs]
+        self.attach(pivot)
+        self.dirty.add(pivot)
+
+    def attach(self, pivot):
+        for cell in self.rows[pivot][0]:
+            self.columns.setdefault(cell, set()).add(pivot)
+
+    def detach(self, pivot):
+        for cell in self.rows[pivot][0]:
+            pivots = self.columns[cell]
+            pivots.discard(pivot)
+            if not pivots:
+                del self.columns[cell]
+
+    def deduce(self):
+        """
+        Returns a dictionary mapping cells to values (0 for safe, 1 for
+        mine) that are forced by the bounds of some changed row.
+
+        A row a1*x1 + ... + an*xn = b with every x either 0 or 1 forces a
+        cell's value if the other value would leave b out of reach of the
+        smallest and largest sums the remaining cells can make.
+        """
+        found = dict()
+        for pivot in self.dirty:
+            if pivot not in self.rows:
+                continue
+            row, rhs = self.rows[pivot]
+            low = sum(value for value in row.values() if value < 0)
+            high = sum(value for value in row.values() if value > 0)
+            for cell, value in row.items():
+                rest_low = low - min(value, 0)
+                rest_high = high - max(value, 0)
+                feasible = [
+                    x for x in (0, 1)
+                    if rest_low + value * x <= rhs <= rest_high + value * x
+                ]
+                if len(feasible) == 1:
+                    found[cell] = feasible[0]
+        self.dirty.clear()
+        return found
+
+
+def combine(row, other, factor):
+    """
+    Adds `factor` times sparse row `other` to sparse row `row` in place.
+    """
+    for cell, value in other.items():
+        total = row.get(cell, 0) + factor * value
+        if total:
+            row[cell] = total
+        else:
+            row.pop(cell, None)
+
+
+class LinearMinesweeperAI(MinesweeperAI):
+    """
+    Minesweeper game player that also solves its knowledge as a system of
+    linear equations
+
+    Subset inference runs first; whenever it reaches a fixpoint, Gaussian
+    elimination with bounds reasoning looks for cells whose value follows
+    from combining any number of sentences, and the two alternate until
+    neither finds anything new.
+    """
+
+    def __init__(self, height=8, width=8, mines=None):
+        super().__init__(height=height, width=width, mines=mines)
+        self.system = LinearSystem()
+
+        # Number of cells found by the linear solver but not by subsets
+        self.deductions = 0
+
+    def add_knowledge(self, cell, count):
+        """
+        Adds the equation for the cells around `cell` to the linear system
+        before the usual update. Only observations become equations: the
+        sentences subset inference derives from them are combinations of
+        rows the system already has.
+        """
+        neighbors = [
+            (i, j)
+            for i in range(cell[0] - 1, cell[0] + 2)
+            for j in range(cell[1] - 1, cell[1] + 2)
+            if 0 <= i < self.height and 0 <= j < self.width and (i, j) != cell
+        ]
+        self.system.add(neighbors, count)
+        super().add_knowledge(cell, count)
+
+    def mark_mine(self, cell):
+        self.system.assign(cell, 1)
+        super().mark_mine(cell)
+
+    def mark_safe(self, cell):
+        self.system.assign(cell, 0)
+        super().mark_safe(cell)
+
+    def infer(self):
+        """
+        Draws conclusions with subset inference and linear elimination
+        until nothing changes.
+        """
+        while True:
+            super().infer()
+            found = {
+                cell: value for cell, value in self.system.deduce().items()
+                if cell not in self.mines and cell not in self.safes
+            }
+            if not found:
+                return
+            self.deductions += len(found)
+            for cell, value in found.items():
+                if value:
+                    self.mark_mine(cell)
+                else:
+                    self.mark_safe(cell)
@@ -1,5 +1,7 @@
 import itertools
+import math
 import random
+import time
 
 
 class Minesweeper:
@@ -91,12 +93,29 @@ class Sentence:
     and a count of the number of those cells which are mines.
     """
 
+    __slots__ = ("cells", "count", "mask", "_hash")
+
     def __init__(self, cells, count):
         self.cells = set(cells)
         self.count = count
 
+        # Cells as a bitmask, set by the MinesweeperAI that holds the
+        # sentence, so subset tests need no new sets
+        self.mask = 0
+
+        # Hash, cached until a cell is marked
+        self._hash = None
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return (isinstance(other, Sentence)
+                and self.cells == other.cells and self.count == other.count)
+
+    def __hash__(self):
+        # Sentences change as cells are marked, so a sentence must be taken
+        # out of any set or index before it is updated
+        if self._hash is None:
+            self._hash = hash((frozenset(self.cells), self.count))
+        return self._hash
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
@@ -125,6 +144,7 @@ class Sentence:
         if cell in self.cells:
             self.cells.remove(cell)
             self.count -= 1
+            self._hash = None
 
     def mark_safe(self, cell):
         """
@@ -133,6 +153,7 @@ class Sentence:
         """
         if cell in self.cells:
             self.cells.remove(cell)
+            self._hash = None
 
 
 class MinesweeperAI:
@@ -140,11 +161,23 @@ class MinesweeperAI:
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    # Assumed fraction of mines when the total number is not known
+    DENSITY = 0.15
+
+    # Limits on exact counting of assignments when guessing
+    MAX_COMPONENT = 48
+    SEARCH_BUDGET = 200000
+    SAMPLES = 100
+
+    # Seconds one guess may spend counting assignments in all components
+    TIME_BUDGET = 1.0
 
-        # Set initial height and width
+    def __init__(self, height=8, width=8, mines=None):
+
+        # Set initial height and width, and total number of mines if known
         self.height = height
         self.width = width
+        self.total_mines = mines
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -153,8 +186,49 @@ class MinesweeperAI:
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Known safe cells that have not been clicked on yet
+        self.safe_moves = set()
+
+        # Set of sentences about the game known to be true
+        self.knowledge = set()
+
+        # Map from each cell to the sentences that mention it
+        self.index = dict()
+
+        # Sentences that are new or changed and still need to be examined
+        self.pending = []
+
+        # Memoized assignment counts for components of the knowledge base
+        self.solutions = dict()
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and queues it for inference,
+        unless it is empty or already known.
+        """
+        if not sentence.cells or sentence in self.knowledge:
+            return
+        self.knowledge.add(sentence)
+
+        # Cell (i, j) is bit i * width + j of the sentence's mask
+        mask = 0
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(sentence)
+            mask |= 1 << (cell[0] * self.width + cell[1])
+        sentence.mask = mask
+        self.pending.append(sentence)
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a sentence from the knowledge base and the cell index.
+        """
+        self.knowledge.discard(sentence)
+        for cell in sentence.cells:
+            sentences = self.index.get(cell)
+            if sentences is not None:
+                sentences.discard(sentence)
+                if not sentences:
+                    del self.index[cell]
 
     def mark_mine(self, cell):
         """
@@ -162,8 +236,10 @@ class MinesweeperAI:
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        for sentence in list(self.index.get(cell, ())):
+            self.remove_sentence(sentence)
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
@@ -171,8 +247,12 @@ class MinesweeperAI:
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence in list(self.index.get(cell, ())):
+            self.remove_sentence(sentence)
             sentence.mark_safe(cell)
+            self.add_sentence(sentence)
 
     def add_knowledge(self, cell, count):
         """
@@ -192,63 +272,68 @@ class MinesweeperAI:
 
         # step 1 and 2
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
         self.mark_safe(cell)
 
         # step 3
 
-        # get neighboring cells
+        # get neighboring cells that are not already known
         neighbors = []
         for i in range(cell[0] - 1, cell[0] + 2):
             for j in range(cell[1] - 1, cell[1] + 2):
                 if 0 <= i < self.height and 0 <= j < self.width:
                     neighbor = (i, j)
-                    if neighbor != cell:
+                    if neighbor == cell or neighbor in self.safes:
+                        continue
+                    if neighbor in self.mines:
+                        count -= 1
+                    else:
                         neighbors.append(neighbor)
 
         # create new sentence
-        self.knowledge.append(Sentence(neighbors, count))
+        self.add_sentence(Sentence(neighbors, count))
 
-        # step 4
+        # step 4 and 5
+        self.infer()
 
-        # mark new mines and new safes
-        for sentence in self.knowledge:
+    def infer(self):
+        """
+        Draws conclusions from pending sentences until nothing changes.
+
+        Only sentences that are new or changed are examined, and each is
+        only compared with the sentences that share a cell with it.
+        """
+        while self.pending:
+            sentence = self.pending.pop()
+            if sentence not in self.knowledge:
+                continue
+
+            # mark new mines and new safes
             mines = sentence.known_mines().copy()
-            mines = mines.union(self.mines)
             for mine in mines:
                 self.mark_mine(mine)
-
             safes = sentence.known_safes().copy()
-            safes = safes.union(self.safes)
             for safe in safes:
                 self.mark_safe(safe)
-
-        # step 5
-
-        # compare all pieces of knowledge
-        knowledge_new = []
-        for sentence_1 in self.knowledge:
-            for sentence_2 in self.knowledge:
+            if mines or safes:
+                continue
+
+            # compare with overlapping knowledge
+            overlapping = set()
+            for cell in sentence.cells:
+                overlapping |= self.index[cell]
+            mask = sentence.mask
+            for other in overlapping:
+                other_mask = other.mask
+                if other_mask == mask:
+                    continue
                 # if one is a subset and not the same, infer new knowledge
-                if sentence_2.cells.issubset(sentence_1.cells) and len(
-                    sentence_1.cells
-                ) != len(sentence_2.cells):
-                    new_set = sentence_1.cells - sentence_2.cells
-                    new_count = sentence_1.count - sentence_2.count
-                    new_sentence = Sentence(new_set, new_count)
-                    # prevent repeats
-                    if (
-                        new_sentence not in self.knowledge
-                        and new_sentence not in knowledge_new
-                    ):
-                        knowledge_new.append(new_sentence)
-        self.knowledge += knowledge_new
-
-        # clean duplicate knowledge
-        clean = []
-        for sentence in self.knowledge:
-            if sentence not in clean:
-                clean.append(sentence)
-        self.knowledge = clean
+                if other_mask & ~mask == 0:
+                    self.add_sentence(Sentence(sentence.cells - other.cells,
+                                               sentence.count - other.count))
+                elif mask & ~other_mask == 0:
+                    self.add_sentence(Sentence(other.cells - sentence.cells,
+                                               other.count - sentence.count))
 
     def make_safe_move(self):
         """
@@ -259,24 +344,262 @@ class MinesweeperAI:
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for cell in self.safes:
-            if cell not in self.moves_made and cell not in self.mines:
-                return cell
+        for cell in self.safe_moves:
+            return cell
         return None
 
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        The cell with the lowest probability of being a mine, given
+        everything in the knowledge base, is chosen; ties are broken
+        randomly.
         """
         moves = []
-        for i in range(self.width):
-            for j in range(self.height):
+        for i in range(self.height):
+            for j in range(self.width):
                 move = (i, j)
                 if move not in self.moves_made and move not in self.mines:
                     moves.append(move)
-        if len(moves) > 0:
+        if len(moves) == 0:
+            return None
+
+        probabilities = self.mine_probabilities(moves)
+        if probabilities is None:
             return random.choice(moves)
+        lowest = min(probabilities.values())
+        return random.choice([
+            move for move in moves if probabilities[move] <= lowest + 1e-12
+        ])
+
+    def mine_probabilities(self, moves):
+        """
+        Returns a dictionary mapping each cell in `moves` to the probability
+        that it is a mine, or None if the knowledge base is inconsistent
+        with the number of mines left.
+
+        Cells mentioned by the knowledge base are split into independent
+        components. Each component's consistent mine assignments are
+        counted by number of mines, and the components are combined with
+        the number of ways to place the remaining mines on cells that no
+        sentence mentions. If the number of mines is unknown, every cell is
+        instead assumed to be a mine with probability `DENSITY`.
+
+        Counting stops once `TIME_BUDGET` seconds have passed; the cells of
+        components that were not solved by then are treated like cells
+        that no sentence mentions.
+        """
+        moves = set(moves)
+        deadline = time.perf_counter() + MinesweeperAI.TIME_BUDGET
+        groups = []
+        components = []
+        for cells, sentences in self.components(moves):
+            result = self.solve_component(cells, sentences, deadline)
+            if result is not None:
+                groups.append((cells, sentences))
+                components.append(result)
+        rest = len(moves.difference(*(cells for cells, _ in groups)))
+
+        # weight of placing the other mines on cells outside the frontier
+        if self.total_mines is None:
+            ratio = MinesweeperAI.DENSITY / (1 - MinesweeperAI.DENSITY)
+
+            def weight(k):
+                return ratio ** k
+        else:
+            left = self.total_mines - len(self.mines)
+
+            def weight(k):
+                return math.comb(rest, left - k) if 0 <= left - k <= rest else 0
+
+        def convolve(distributions):
+            total = {0: 1}
+            for distribution in distributions:
+                combined = dict()
+                for a, ways_a in total.items():
+                    for b, ways_b in distribution.items():
+                        combined[a + b] = combined.get(a + b, 0) + ways_a * ways_b
+                total = combined
+            return total
+
+        distributions = [ways for ways, _ in components]
+        total = convolve(distributions)
+        normalizer = sum(ways * weight(k) for k, ways in total.items())
+        if normalizer == 0:
+            return None
+
+        probabilities = dict()
+        for c, (ways, cell_ways) in enumerate(components):
+            others = convolve(distributions[:c] + distributions[c + 1:])
+            for k, counts in cell_ways.items():
+                factor = sum(o * weight(k + j) for j, o in others.items())
+                for cell, count in counts.items():
+                    probabilities[cell] = probabilities.get(cell, 0) + count * factor
+        for cell in probabilities:
+            probabilities[cell] /= normalizer
+
+        # cells that no sentence mentions all share the same probability
+        if self.total_mines is None:
+            unconstrained = MinesweeperAI.DENSITY
+        elif rest:
+            unconstrained = sum(
+                ways * weight(k) * (left - k) for k, ways in total.items()
+            ) / (normalizer * rest)
+        for move in moves:
+            if move not in probabilities:
+                probabilities[move] = unconstrained
+        return probabilities
+
+    def components(self, moves):
+        """
+        Returns a list of (cells, sentences) pairs, one for each group of
+        sentences in the knowledge base connected by shared cells.
+        """
+        seen = set()
+        groups = []
+        for sentence in self.knowledge:
+            if sentence in seen:
+                continue
+            cells = set()
+            sentences = []
+            frontier = [sentence]
+            seen.add(sentence)
+            while frontier:
+                current = frontier.pop()
+                sentences.append(current)
+                for cell in current.cells - cells:
+                    cells.add(cell)
+                    for other in self.index[cell]:
+                        if other not in seen:
+                            seen.add(other)
+                            frontier.append(other)
+            groups.append((cells & moves, sentences))
+        return groups
+
+    def solve_component(self, cells, sentences, deadline=None):
+        """
+        Returns a pair (ways, cell_ways) for a component, where `ways` maps
+        a number of mines k to how many consistent assignments place k
+        mines, and `cell_ways[k]` maps each cell to how many of those
+        assignments make it a mine, or None if nothing was found before
+        `deadline` (a `time.perf_counter` value).
+
+        Results are memoized by the component's sentences. Components
+        larger than `MAX_COMPONENT` cells, or whose search takes more than
+        `SEARCH_BUDGET` steps, are estimated from up to `SAMPLES` randomly
+        searched assignments instead. Each sample is the first assignment
+        a randomly ordered search finds, which is not uniform over the
+        consistent assignments, so the estimate is only a heuristic.
+        """
+        key = frozenset((frozenset(s.cells), s.count) for s in sentences)
+        if key in self.solutions:
+            return self.solutions[key]
+
+        result = None
+        if len(cells) <= MinesweeperAI.MAX_COMPONENT:
+            result = search_assignments(cells, sentences,
+                                        MinesweeperAI.SEARCH_BUDGET,
+                                        deadline=deadline)
+        if result is None:
+            samples = ({}, {})
+            for _ in range(MinesweeperAI.SAMPLES):
+                sample = search_assignments(cells, sentences,
+                                            MinesweeperAI.SEARCH_BUDGET,
+                                            rng=random, deadline=deadline)
+                if sample is None:
+                    if deadline is not None and time.perf_counter() > deadline:
+                        break
+                    continue
+                for k, ways in sample[0].items():
+                    samples[0][k] = samples[0].get(k, 0) + ways
+                    counts = samples[1].setdefault(k, {})
+                    for cell, count in sample[1][k].items():
+                        counts[cell] = counts.get(cell, 0) + count
+            if samples[0]:
+                result = samples
+
+        # unsolved components are tried again on the next guess
+        if result is None:
+            return None
+        if len(self.solutions) > 1000:
+            self.solutions.clear()
+        self.solutions[key] = result
+        return result
+
+
+def search_assignments(cells, sentences, budget, rng=None, deadline=None):
+    """
+    Searches for assignments of mines to `cells` consistent with every
+    sentence, returning a (ways, cell_ways) pair as described in
+    `MinesweeperAI.solve_component`, or None if more than `budget` search
+    steps are needed or the search is still running at `deadline`.
+
+    If `rng` is given, cells and values are tried in random order and the
+    search stops at the first consistent assignment.
+    """
+    cells = list(cells)
+    if rng is not None:
+        rng.shuffle(cells)
+    needed = [sentence.count for sentence in sentences]
+    unassigned = [len(sentence.cells) for sentence in sentences]
+    touching = {cell: [] for cell in cells}
+    for s, sentence in enumerate(sentences):
+        for cell in sentence.cells:
+            if cell in touching:
+                touching[cell].append(s)
+
+    ways = dict()
+    cell_ways = dict()
+    mines = []
+    steps = 0
+
+    def assign(i):
+        """Returns True once the search should stop."""
+        nonlocal steps
+        steps += 1
+        if steps > budget:
+            return True
+
+        # checking the clock every step would slow the search down
+        if deadline is not None and steps % 1024 == 1:
+            if time.perf_counter() > deadline:
+                steps = budget + 1
+                return True
+        if i == len(cells):
+            k = len(mines)
+            ways[k] = ways.get(k, 0) + 1
+            counts = cell_ways.setdefault(k, {cell: 0 for cell in cells})
+            for mine in mines:
+                counts[mine] += 1
+            return rng is not None
+
+        cell = cells[i]
+        values = [0, 1]
+        if rng is not None:
+            rng.shuffle(values)
+        for value in values:
+            if all(0 <= needed[s] - value <= unassigned[s] - 1
+                   for s in touching[cell]):
+                for s in touching[cell]:
+                    needed[s] -= value
+                    unassigned[s] -= 1
+                if value:
+                    mines.append(cell)
+                found = assign(i + 1)
+                if value:
+                    mines.pop()
+                for s in touching[cell]:
+                    needed[s] += value
+                    unassigned[s] += 1
+                if found:
+                    return True
+        return False
+
+    assign(0)
+    if steps > budget:
         return None
+    return ways, cell_ways
@@ -0,0 +1,169 @@
+import multiprocessing
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+from linear import LinearMinesweeperAI
+
+# Use the NumPy board for simulated games when NumPy and SciPy are
+# installed, which also uncovers regions with no nearby mines at once
+try:
+    from board import ArrayMinesweeper as Board
+except ImportError:
+    Board = Minesweeper
+
+# AI players that can be simulated, by inference backend
+PLAYERS = {
+    "subset": MinesweeperAI,
+    "linear": LinearMinesweeperAI,
+}
+
+# Number of points at which knowledge base size is reported over a game
+CHECKPOINTS = 10
+
+
+def main():
+    args = sys.argv[1:]
+    player = args.pop(0) if args and args[0] in PLAYERS else "subset"
+    if len(args) < 2:
+        sys.exit("Usage: python simulate.py [subset|linear] games "
+                 "HEIGHTxWIDTHxMINES [...]\n"
+                 "MINES may also be a density such as 0.15")
+    games = int(args[0])
+    for config in args[1:]:
+        height, width, mines = parse_config(config)
+        results = simulate(height, width, mines, games, player)
+        report(f"{height}x{width} with {mines} mines ({player})", results)
+
+
+def parse_config(config):
+    """
+    Parse a board configuration such as "16x16x40" or "16x16x0.15" into
+    a tuple (height, width, mines).
+    """
+    height, width, mines = config.lower().split("x")
+    height, width = int(height), int(width)
+    if "." in mines:
+        mines = round(float(mines) * height * width)
+    return height, width, int(mines)
+
+
+def simulate(height, width, mines, games, player="subset", processes=None):
+    """
+    Play `games` games on boards of the given size in a process pool,
+    returning a list of the statistics from each `play` call.
+    """
+    jobs = [(height, width, mines, seed, player) for seed in range(games)]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(play, jobs)
+
+
+def play(job):
+    """
+    Play one game of Minesweeper with the AI and return a dictionary of
+    statistics about it.
+    """
+    height, width, mines, seed, player = job
+    random.seed(seed)
+    game = Board(height=height, width=width, mines=mines)
+    ai = PLAYERS[player](height=height, width=width, mines=mines)
+
+    moves = 0
+    guesses = 0
+    knowledge_time = 0
+    sizes = []
+    won = False
+    start = time.perf_counter()
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                won = True
+                break
+            guesses += 1
+        moves += 1
+        if game.is_mine(move):
+            break
+
+        # tell the AI about every cell the click uncovered, itself first
+        uncovered = uncover(game, move)
+        begin = time.perf_counter()
+        ai.add_knowledge(move, uncovered.pop(move))
+        for cell, count in uncovered.items():
+            if cell not in ai.moves_made:
+                ai.add_knowledge(cell, count)
+        knowledge_time += time.perf_counter() - begin
+        sizes.append(len(ai.knowledge))
+
+        if len(ai.moves_made) == height * width - mines:
+            won = True
+            break
+
+    return {
+        "won": won,
+        "moves": moves,
+        "guesses": guesses,
+        "seconds": time.perf_counter() - start,
+        "knowledge_time": knowledge_time,
+        "sizes": sizes,
+        "deductions": getattr(ai, "deductions", 0),
+    }
+
+
+def uncover(game, cell):
+    """
+    Return a dictionary mapping each cell uncovered by clicking on `cell`
+    to its number of nearby mines. Boards without `reveal` only uncover
+    the cell itself.
+    """
+    if hasattr(game, "reveal"):
+        return game.reveal(cell)
+    return {cell: game.nearby_mines(cell)}
+
+
+def report(title, results):
+    """
+    Print a summary of the statistics from a list of games.
+    """
+    games = len(results)
+    wins = sum(result["won"] for result in results)
+    moves = sum(result["moves"] for result in results)
+    seconds = sum(result["seconds"] for result in results)
+    updates = sum(len(result["sizes"]) for result in results)
+    knowledge_time = sum(result["knowledge_time"] for result in results)
+
+    print(title)
+    print(f"  Win rate: {wins / games:.2%} ({wins}/{games})")
+    print(f"  Moves per second: {moves / seconds:.0f}")
+    print(f"  Guesses per game: "
+          f"{sum(result['guesses'] for result in results) / games:.2f}")
+    print(f"  Extra deductions per game: "
+          f"{sum(result['deductions'] for result in results) / games:.2f}")
+    if updates:
+        print(f"  Time per add_knowledge: "
+              f"{knowledge_time / updates * 1000:.3f} ms")
+
+    # average knowledge base size at evenly spaced points through each game
+    curve = [0] * CHECKPOINTS
+    counts = [0] * CHECKPOINTS
+    for result in results:
+        sizes = result["sizes"]
+        for point in range(CHECKPOINTS):
+            if sizes:
+                index = (len(sizes) - 1) * point // (CHECKPOINTS - 1)
+                curve[point] += sizes[index]
+                counts[point] += 1
+    curve = [
+        f"{total / count:.1f}" if count else "-"
+        for total, count in zip(curve, counts)
+    ]
+    print(f"  Knowledge base size over a game: {' '.join(curve)}")
+    print(f"  Peak knowledge base size: "
+          f"{max((max(r['sizes'], default=0) for r in results), default=0)}")
+
+
+if __name__ == "__main__":
+    main()
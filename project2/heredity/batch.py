@@ -0,0 +1,167 @@
+import csv
+import json
+import multiprocessing
+import os
+import sys
+
+from elimination import infer
+from heredity import load_data
+
+FORMATS = ["jsonl", "csv"]
+
+CSV_FIELDS = ["file", "family", "name", "gene_2", "gene_1", "gene_0",
+              "trait_true", "trait_false"]
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python batch.py directory|- "
+                 "[output.jsonl|output.csv]")
+    paths = family_files(sys.argv[1])
+    output = sys.argv[2] if len(sys.argv) == 3 else None
+    output_format = "csv" if output and output.endswith(".csv") else "jsonl"
+
+    if output:
+        with open(output, "w", newline="") as f:
+            processed, failed = run(paths, f, output_format)
+    else:
+        processed, failed = run(paths, sys.stdout, output_format)
+    print(f"Processed {processed} files, {failed} failed", file=sys.stderr)
+
+
+def family_files(source):
+    """
+    Return an iterator over family CSV files: every .csv file in a
+    directory, in sorted order, or one path per line read from standard
+    input if `source` is "-", so files can be streamed in as they arrive.
+    """
+    if source == "-":
+        return (line.strip() for line in sys.stdin if line.strip())
+    return iter(sorted(
+        os.path.join(source, name) for name in os.listdir(source)
+        if name.endswith(".csv")
+    ))
+
+
+def run(paths, f, output_format="jsonl", processes=None):
+    """
+    Run inference on every family file in `paths` in a pool of worker
+    processes, writing each person's probabilities to the open file `f`
+    as soon as their file is done. Returns a tuple (processed, failed)
+    counting the files that were written out and those that were not.
+
+    Files that cannot be read are reported on standard error and skipped.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"unknown format {output_format}")
+    if output_format == "csv":
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+
+    processed = 0
+    failed = 0
+    with multiprocessing.Pool(processes) as pool:
+        for path, rows, error in pool.imap(infer_file, paths):
+            if error is not None:
+                failed += 1
+                print(f"{path}: {error}", file=sys.stderr)
+                continue
+            processed += 1
+            for row in rows:
+                if output_format == "csv":
+                    writer.writerow(flatten(row))
+                else:
+                    f.write(json.dumps(row) + "\n")
+            f.flush()
+    return processed, failed
+
+
+def infer_file(path):
+    """
+    Return a tuple (path, rows, error) with one row for each person in a
+    family file, or the error that stopped it from being processed.
+
+    Each connected group of relatives is solved as its own problem, since
+    people in different groups tell us nothing about each other. Any error
+    is caught, so one bad file cannot stop the rest of the batch.
+    """
+    try:
+        people = load_data(path)
+        check_parents(people)
+        rows = []
+        for number, family in enumerate(families(people)):
+            probabilities = infer(family)
+            for name in family:
+                rows.append({
+                    "file": path,
+                    "family": number,
+                    "name": name,
+                    "gene": probabilities[name]["gene"],
+                    "trait": probabilities[name]["trait"],
+                })
+    except Exception as error:
+        return path, None, repr(error)
+    return path, rows, None
+
+
+def check_parents(people):
+    """
+    Raise ValueError unless everyone in a dictionary returned by
+    `load_data` has either both parents or neither, and every parent
+    is in the file.
+    """
+    for name, person in people.items():
+        parents = (person["mother"], person["father"])
+        if (parents[0] is None) != (parents[1] is None):
+            raise ValueError(f"{name} has only one parent")
+        for parent in parents:
+            if parent is not None and parent not in people:
+                raise ValueError(f"{name} has unknown parent {parent}")
+
+
+def families(people):
+    """
+    Return a list of dictionaries in the form returned by `load_data`,
+    one for each group of people connected by parent links, in the
+    order their first member appears.
+    """
+    # Union-find over people, joining each child with their parents
+    leader = {name: name for name in people}
+
+    def find(name):
+        while leader[name] != name:
+            leader[name] = leader[leader[name]]
+            name = leader[name]
+        return name
+
+    for name, person in people.items():
+        for parent in (person["mother"], person["father"]):
+            if parent is not None:
+                leader[find(parent)] = find(name)
+
+    groups = dict()
+    for name, person in people.items():
+        groups.setdefault(find(name), dict())[name] = person
+    return list(groups.values())
+
+
+def flatten(row):
+    """
+    Return a row as a dictionary with the fields in `CSV_FIELDS`.
+    """
+    return {
+        "file": row["file"],
+        "family": row["family"],
+        "name": row["name"],
+        "gene_2": row["gene"][2],
+        "gene_1": row["gene"][1],
+        "gene_0": row["gene"][0],
+        "trait_true": row["trait"][True],
+        "trait_false": row["trait"][False],
+    }
+
+
+if __name__ == "__main__":
+    main()
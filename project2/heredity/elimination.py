@@ -0,0 +1,268 @@
+import heapq
+import itertools
+import sys
+
+from heredity import (
+    TRAIT_LIKELIHOOD, load_data, person_factor, print_probabilities
+)
+
+GENES = (0, 1, 2)
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python elimination.py data.csv")
+    people = load_data(sys.argv[1])
+    print_probabilities(people, infer(people))
+
+
+class Factor():
+    """
+    Function from assignments of gene counts to some people to a number
+
+    `variables` is a tuple of names and `table` maps each tuple of gene
+    counts, in the same order, to a value.
+    """
+
+    def __init__(self, variables, table):
+        self.variables = tuple(variables)
+        self.table = table
+
+    def __repr__(self):
+        return f"Factor({self.variables})"
+
+    def multiply(self, other):
+        """Return the product of two factors."""
+        variables = self.variables + tuple(
+            v for v in other.variables if v not in self.variables
+        )
+        mine = [variables.index(v) for v in self.variables]
+        theirs = [variables.index(v) for v in other.variables]
+        table = dict()
+        for values in itertools.product(GENES, repeat=len(variables)):
+            table[values] = (
+                self.table[tuple(values[i] for i in mine)]
+                * other.table[tuple(values[i] for i in theirs)]
+            )
+        return Factor(variables, table)
+
+    def sum_out(self, variable):
+        """
+        Return the factor with `variable` summed out, scaled so its largest
+        value is 1 to avoid underflow on large families.
+        """
+        position = self.variables.index(variable)
+        variables = self.variables[:position] + self.variables[position + 1:]
+        table = dict()
+        for values, value in self.table.items():
+            key = values[:position] + values[position + 1:]
+            table[key] = table.get(key, 0) + value
+        largest = max(table.values())
+        if largest > 0:
+            table = {key: value / largest for key, value in table.items()}
+        return Factor(variables, table)
+
+
+def factors(people):
+    """
+    Return a list with one factor for each person: the probability of
+    their genes given their parents' genes, times the probability of
+    their known trait given their genes.
+    """
+    result = []
+    for name, person in people.items():
+        trait = person["trait"]
+        if person["mother"] is None:
+            result.append(Factor((name,), {
+                (g,): person_factor(g, None, None, trait) for g in GENES
+            }))
+        else:
+            mother, father = person["mother"], person["father"]
+            result.append(Factor((name, mother, father), {
+                (g, m, f): person_factor(g, m, f, trait)
+                for g, m, f in itertools.product(GENES, repeat=3)
+            }))
+    return result
+
+
+def elimination_order(factors, cliques=False):
+    """
+    Return an order in which to eliminate every variable, greedily choosing
+    the variable with the fewest neighbors in the graph joining variables
+    that share a factor (the min-degree heuristic), and connecting its
+    neighbors to each other as it is eliminated.
+
+    On a pedigree without loops this eliminates people from the edges of
+    the family inward, so no intermediate factor has more than three
+    variables.
+
+    If `cliques` is True, return a tuple (order, cliques) where `cliques`
+    is a list of the frozenset each variable forms with its neighbors
+    when it is eliminated, in the same order.
+    """
+    neighbors = dict()
+    for factor in factors:
+        for variable in factor.variables:
+            neighbors.setdefault(variable, set()).update(factor.variables)
+    for variable in neighbors:
+        neighbors[variable].discard(variable)
+
+    # Heap of (number of neighbors, variable), skipping stale entries
+    heap = [(len(adjacent), variable)
+            for variable, adjacent in neighbors.items()]
+    heapq.heapify(heap)
+    order = []
+    formed = []
+    while heap:
+        degree, variable = heapq.heappop(heap)
+        if variable not in neighbors or degree != len(neighbors[variable]):
+            continue
+        adjacent = neighbors.pop(variable)
+        for other in adjacent:
+            neighbors[other].discard(variable)
+            neighbors[other].update(adjacent - {other})
+            heapq.heappush(heap, (len(neighbors[other]), other))
+        order.append(variable)
+        if cliques:
+            formed.append(frozenset(adjacent | {variable}))
+    if cliques:
+        return order, formed
+    return order
+
+
+def eliminate(factors, order, keep):
+    """
+    Return a dictionary mapping gene counts of person `keep` to their
+    probability, summing every other variable out of the factors in the
+    given order.
+    """
+    # Map from each variable to the factors that mention it
+    buckets = dict()
+    for factor in factors:
+        for variable in factor.variables:
+            buckets.setdefault(variable, set()).add(factor)
+
+    result = Factor((keep,), {(g,): 1 for g in GENES})
+    for variable in order:
+        if variable == keep:
+            continue
+        touching = buckets.pop(variable)
+        product = None
+        for factor in touching:
+            product = factor if product is None else product.multiply(factor)
+            for other in factor.variables:
+                if other != variable:
+                    buckets[other].discard(factor)
+
+        # Factors left without variables only scale the result
+        summed = product.sum_out(variable)
+        for other in summed.variables:
+            buckets[other].add(summed)
+
+    for factor in buckets.pop(keep):
+        result = result.multiply(factor)
+    total = sum(result.table.values())
+    return {g: result.table[(g,)] / total for g in GENES}
+
+
+def trait_distribution(person, genes):
+    """
+    Return a person's trait distribution given their gene distribution.
+    """
+    if person["trait"] is not None:
+        return {True: float(person["trait"]), False: float(not person["trait"])}
+    present = sum(genes[g] * TRAIT_LIKELIHOOD[True][g] for g in GENES)
+    return {True: present, False: 1 - present}
+
+
+def propagate(factors, order):
+    """
+    Return a dictionary mapping each variable to a dictionary mapping its
+    gene counts to their probability, for every variable at once.
+
+    Eliminating variables in `order` forms a tree of buckets: bucket i
+    holds the factors whose first variable to be eliminated is the i-th,
+    and sends its product, with that variable summed out, to the bucket
+    of the first variable left in it. One pass up the tree and one pass
+    back down give every bucket the messages from all of its neighbors,
+    so each marginal is read from a single bucket. On pedigrees without
+    loops no bucket has more than three variables, so the whole family
+    takes time linear in its size.
+    """
+    position = {variable: i for i, variable in enumerate(order)}
+    potentials = [Factor((), {(): 1}) for _ in order]
+    for factor in factors:
+        i = min(position[variable] for variable in factor.variables)
+        potentials[i] = potentials[i].multiply(factor)
+
+    # Collect: each bucket sends a message to a bucket eliminated later
+    parent = [None] * len(order)
+    children = [[] for _ in order]
+    upward = dict()
+    for i, variable in enumerate(order):
+        product = potentials[i]
+        for child in children[i]:
+            product = product.multiply(upward[child])
+        message = product.sum_out(variable)
+        if message.variables:
+            parent[i] = min(position[other] for other in message.variables)
+            children[parent[i]].append(i)
+            upward[i] = message
+
+    # Distribute: each bucket hears from its parent, which is later in order
+    downward = dict()
+    for i in reversed(range(len(order))):
+        p = parent[i]
+        if p is None:
+            continue
+        product = potentials[p]
+        if p in downward:
+            product = product.multiply(downward[p])
+        for sibling in children[p]:
+            if sibling != i:
+                product = product.multiply(upward[sibling])
+        for variable in product.variables:
+            if variable not in upward[i].variables:
+                product = product.sum_out(variable)
+        downward[i] = product
+
+    marginals = dict()
+    for i, variable in enumerate(order):
+        belief = potentials[i]
+        if i in downward:
+            belief = belief.multiply(downward[i])
+        for child in children[i]:
+            belief = belief.multiply(upward[child])
+        for other in belief.variables:
+            if other != variable:
+                belief = belief.sum_out(other)
+        total = sum(belief.table.values())
+        marginals[variable] = {g: belief.table[(g,)] / total for g in GENES}
+    return marginals
+
+
+def infer(people):
+    """
+    Return the gene and trait distribution of every person, in the same
+    structure as `probabilities` in `heredity.main`, by variable
+    elimination over the pedigree.
+
+    Every person's gene distribution comes from the same two passes of
+    `propagate`, rather than one elimination per person.
+    """
+    pedigree = factors(people)
+    marginals = propagate(pedigree, elimination_order(pedigree))
+    probabilities = dict()
+    for name, person in people.items():
+        genes = marginals[name]
+        probabilities[name] = {
+            "gene": {2: genes[2], 1: genes[1], 0: genes[0]},
+            "trait": trait_distribution(person, genes),
+        }
+    return probabilities
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import csv
+import functools
 import itertools
 import sys
 
@@ -18,6 +19,48 @@ PROBS = {
 }
 
 
+def inheritance_table():
+    """
+    Return a 3x3x3 table, as nested tuples, whose entry [g][m][f] is the
+    probability that a child has g copies of the gene given that their
+    mother has m copies and their father has f copies.
+    """
+    # probability a parent with 0, 1 or 2 copies passes one on
+    passed = (PROBS["mutation"], 0.5, 1 - PROBS["mutation"])
+    return (
+        tuple(tuple((1 - m) * (1 - f) for f in passed) for m in passed),
+        tuple(tuple(m * (1 - f) + f * (1 - m) for f in passed) for m in passed),
+        tuple(tuple(m * f for f in passed) for m in passed),
+    )
+
+
+# Tables computed once from PROBS and shared by every inference engine
+INHERITANCE = inheritance_table()
+PRIOR = tuple(PROBS["gene"][g] for g in range(3))
+
+# Probability of a trait, or of no evidence, given 0, 1 or 2 copies
+TRAIT_LIKELIHOOD = {
+    True: tuple(PROBS["trait"][g][True] for g in range(3)),
+    False: tuple(PROBS["trait"][g][False] for g in range(3)),
+    None: (1, 1, 1),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def person_factor(genes, mother, father, trait):
+    """
+    Return one person's contribution to a joint probability: the
+    probability of their number of copies of the gene given their
+    parents' (None for people without parents in the data), times the
+    probability of their trait (None if unknown) given their genes.
+    """
+    if mother is None:
+        gene_prob = PRIOR[genes]
+    else:
+        gene_prob = INHERITANCE[genes][mother][father]
+    return gene_prob * TRAIT_LIKELIHOOD[trait][genes]
+
+
 def main():
 
     # Check for proper usage
@@ -25,6 +68,25 @@ def main():
         sys.exit("Usage: python heredity.py data.csv")
     people = load_data(sys.argv[1])
 
+    # Sum joint probabilities in NumPy batches if it is installed,
+    # otherwise one assignment at a time
+    try:
+        from vectorized import enumerate_probabilities
+    except ImportError:
+        probabilities = enumerate_joint_probabilities(people)
+    else:
+        probabilities = enumerate_probabilities(people)
+
+    # Print results
+    print_probabilities(people, probabilities)
+
+
+def enumerate_joint_probabilities(people):
+    """
+    Return the gene and trait distribution of every person by calling
+    `joint_probability` for every assignment of genes and traits.
+    """
+
     # Keep track of gene and trait probabilities for each person
     probabilities = {
         person: {"gene": {2: 0, 1: 0, 0: 0}, "trait": {True: 0, False: 0}}
@@ -56,8 +118,13 @@ def main():
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
+
+def print_probabilities(people, probabilities):
+    """
+    Print each person's gene and trait distributions.
+    """
     for person in people:
         print(f"{person}:")
         for field in probabilities[person]:
@@ -118,56 +185,22 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
-    # collect everyone's gene and trait info
-    info = {}
-    for person in people:
-        genes = None
+    def genes(person):
+        if person is None:
+            return None
         if person in one_gene:
-            genes = 1
-        elif person in two_genes:
-            genes = 2
-        else:
-            genes = 0
-        info[person] = {"genes": genes, "trait": person in have_trait}
+            return 1
+        if person in two_genes:
+            return 2
+        return 0
 
-    # calculates probabilities
+    # multiply together each person's cached factor
     joint_prob = 1
-    for person in info:
-        # if they have no parents
-        if people[person]["mother"] is None:
-            gene_prob = PROBS["gene"][info[person]["genes"]]
-            trait_prob = PROBS["trait"][info[person]["genes"]][info[person]["trait"]]
-            joint_prob *= gene_prob * trait_prob
-        else:
-            mother_genes = info[people[person]["mother"]]["genes"]
-            father_genes = info[people[person]["father"]]["genes"]
-
-            # get probability each parent passed the gene on, including mutations
-            if mother_genes == 1:
-                mother_passed = 0.5
-            else:
-                mother_passed = abs((0.5 * mother_genes) - PROBS["mutation"])
-
-            if father_genes == 1:
-                father_passed = 0.5
-            else:
-                father_passed = abs((0.5 * father_genes) - PROBS["mutation"])
-
-            # total probability with mother and father
-            if info[person]["genes"] == 0:
-                # probability not mother and not father
-                gene_prob = (1 - mother_passed) * (1 - father_passed)
-            elif info[person]["genes"] == 1:
-                # probability mother and not father or father and not mother
-                gene_prob = mother_passed * (1 - father_passed) + father_passed * (
-                    1 - mother_passed
-                )
-            else:
-                # probability mother and father
-                gene_prob = mother_passed * father_passed
-
-            trait_prob = PROBS["trait"][info[person]["genes"]][info[person]["trait"]]
-            joint_prob *= gene_prob * trait_prob
+    for person, data in people.items():
+        joint_prob *= person_factor(
+            genes(person), genes(data["mother"]), genes(data["father"]),
+            person in have_trait
+        )
     return joint_prob
 
 
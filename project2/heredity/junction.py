@@ -0,0 +1,243 @@
+import collections
+import functools
+import sys
+
+from elimination import (
+    GENES, Factor, elimination_order, factors, trait_distribution
+)
+from heredity import TRAIT_LIKELIHOOD, load_data, print_probabilities
+
+TRAITS = {"1": True, "0": False, "?": None}
+
+
+def main():
+
+    # Check for proper usage
+    updates = [argument.partition("=") for argument in sys.argv[2:]]
+    if len(sys.argv) < 2 or any(
+        separator != "=" or value not in TRAITS
+        for _, separator, value in updates
+    ):
+        sys.exit("Usage: python junction.py data.csv [name=1|0|? ...]")
+    people = load_data(sys.argv[1])
+    for name, _, _ in updates:
+        if name not in people:
+            sys.exit(f"No person named {name}")
+    tree = JunctionTree(people)
+    print_probabilities(people, tree.probabilities())
+
+    # Print everyone again after each change in evidence
+    for name, _, value in updates:
+        tree.observe(name, TRAITS[value])
+        print(f"\nWith {name}'s trait {value}:")
+        print_probabilities(people, tree.probabilities())
+
+
+def structure(people):
+    """
+    Return a hashable description of a pedigree without its evidence: a
+    tuple of (name, mother, father) for each person.
+    """
+    return tuple(
+        (name, person["mother"], person["father"])
+        for name, person in people.items()
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def compile_pedigree(pedigree):
+    """
+    Return a tuple (cliques, edges, assignment, home) compiling a pedigree,
+    as returned by `structure`, into a junction tree.
+
+    `cliques` is a list of tuples of people, `edges` maps each clique to
+    its neighbors in the tree, `assignment` maps each clique to the
+    factors (of genes given parents' genes) multiplied into it, and `home`
+    maps each person to a clique that contains them.
+
+    Cliques come from eliminating people in min-degree order: each person
+    forms a clique with the neighbors they have when eliminated. Cliques
+    are joined along their largest shared sets of people, which gives
+    every person a connected subtree of cliques. Compiling depends only
+    on who is related to whom, so results are cached and reused when
+    only the evidence changes.
+    """
+    people = {
+        name: {"name": name, "mother": mother, "father": father,
+               "trait": None}
+        for name, mother, father in pedigree
+    }
+    base = factors(people)
+
+    # Keep the cliques formed during elimination that are not contained
+    # in an earlier one
+    cliques = []
+    for clique in elimination_order(base, cliques=True)[1]:
+        if not any(clique <= other for other in cliques):
+            cliques.append(clique)
+
+    # Maximum spanning tree over separator sizes (Kruskal), considering
+    # only cliques that share someone, then joining any separate trees
+    containing = collections.defaultdict(list)
+    for i, clique in enumerate(cliques):
+        for variable in clique:
+            containing[variable].append(i)
+    candidates = {
+        (i, j) for indices in containing.values()
+        for i in indices for j in indices if i < j
+    }
+    candidates = sorted(
+        candidates, key=lambda pair: -len(cliques[pair[0]] & cliques[pair[1]])
+    )
+    leader = list(range(len(cliques)))
+
+    def find(i):
+        while leader[i] != i:
+            leader[i] = leader[leader[i]]
+            i = leader[i]
+        return i
+
+    edges = {i: [] for i in range(len(cliques))}
+    for i, j in candidates + [(0, j) for j in range(1, len(cliques))]:
+        if find(i) != find(j):
+            leader[find(i)] = find(j)
+            edges[i].append(j)
+            edges[j].append(i)
+
+    cliques = [tuple(sorted(clique)) for clique in cliques]
+    assignment = {i: [] for i in range(len(cliques))}
+    for factor in base:
+        i = next(i for i, clique in enumerate(cliques)
+                 if set(factor.variables) <= set(clique))
+        assignment[i].append(factor)
+    home = {
+        name: min(
+            (i for i, clique in enumerate(cliques) if name in clique),
+            key=lambda i: len(cliques[i])
+        )
+        for name in people
+    }
+    return cliques, edges, assignment, home
+
+
+class JunctionTree():
+    """
+    Compiled pedigree for answering repeated queries as evidence changes
+
+    Messages between cliques are computed on demand (Shafer-Shenoy
+    propagation) and kept. Changing one person's trait only discards the
+    messages sent away from that person's clique, so the next query
+    recomputes just the messages on the path to it.
+    """
+
+    def __init__(self, people):
+        self.people = people
+        self.cliques, self.edges, self.assignment, self.home = (
+            compile_pedigree(structure(people))
+        )
+        self.evidence = {name: person["trait"]
+                         for name, person in people.items()}
+
+        # Map from clique to its potential, and from (i, j) to the
+        # message clique i sends clique j
+        self.potentials = dict()
+        self.messages = dict()
+
+    def observe(self, name, trait):
+        """
+        Sets a person's trait to True, False, or None if unknown.
+        """
+        if self.evidence[name] == trait:
+            return
+        self.evidence[name] = trait
+        home = self.home[name]
+        self.potentials.pop(home, None)
+
+        # Discard every message sent away from the changed clique
+        queue = collections.deque([home])
+        seen = {home}
+        while queue:
+            i = queue.popleft()
+            for j in self.edges[i]:
+                if j not in seen:
+                    seen.add(j)
+                    self.messages.pop((i, j), None)
+                    queue.append(j)
+
+    def potential(self, i):
+        """
+        Returns the product of the factors and evidence assigned to clique i.
+        """
+        if i not in self.potentials:
+            result = Factor((), {(): 1})
+            for factor in self.assignment[i]:
+                result = result.multiply(factor)
+            for name in self.cliques[i]:
+                if self.home[name] == i and self.evidence[name] is not None:
+                    likelihood = TRAIT_LIKELIHOOD[self.evidence[name]]
+                    result = result.multiply(Factor(
+                        (name,), {(g,): likelihood[g] for g in GENES}
+                    ))
+            self.potentials[i] = result
+        return self.potentials[i]
+
+    def collect(self, root):
+        """
+        Computes every missing message on the way towards clique `root`,
+        leaves first, without recursion so deep pedigrees are fine.
+        """
+        parent = {root: None}
+        order = [root]
+        for i in order:
+            for j in self.edges[i]:
+                if j not in parent:
+                    parent[j] = i
+                    order.append(j)
+
+        for i in reversed(order[1:]):
+            j = parent[i]
+            if (i, j) in self.messages:
+                continue
+            product = self.potential(i)
+            for k in self.edges[i]:
+                if k != j:
+                    product = product.multiply(self.messages[(k, i)])
+            for variable in product.variables:
+                if variable not in self.cliques[j]:
+                    product = product.sum_out(variable)
+            self.messages[(i, j)] = product
+
+    def marginal(self, name):
+        """
+        Returns a dictionary mapping gene counts of a person to their
+        probability given the current evidence.
+        """
+        i = self.home[name]
+        self.collect(i)
+        belief = self.potential(i)
+        for k in self.edges[i]:
+            belief = belief.multiply(self.messages[(k, i)])
+        for variable in belief.variables:
+            if variable != name:
+                belief = belief.sum_out(variable)
+        total = sum(belief.table.values())
+        return {g: belief.table[(g,)] / total for g in GENES}
+
+    def probabilities(self):
+        """
+        Returns the gene and trait distribution of every person, in the
+        same structure as `probabilities` in `heredity.main`.
+        """
+        probabilities = dict()
+        for name in self.people:
+            genes = self.marginal(name)
+            person = dict(self.people[name], trait=self.evidence[name])
+            probabilities[name] = {
+                "gene": {2: genes[2], 1: genes[1], 0: genes[0]},
+                "trait": trait_distribution(person, genes),
+            }
+        return probabilities
+
+
+if __name__ == "__main__":
+    main()
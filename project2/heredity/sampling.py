@@ -0,0 +1,402 @@
+import math
+import multiprocessing
+import random
+import sys
+
+from elimination import trait_distribution
+from heredity import (
+    INHERITANCE, PRIOR, TRAIT_LIKELIHOOD, load_data, print_probabilities
+)
+
+METHODS = ["likelihood", "gibbs"]
+
+# Default samples per chain, and sweeps discarded at the start of a chain
+SAMPLES = 10000
+BURN_IN = 500
+
+CHAINS = 4
+
+# Number of batches each Gibbs chain is split into to estimate its variance
+BATCHES = 20
+
+GENES = (0, 1, 2)
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in (2, 3, 4) or (
+        len(sys.argv) > 2 and sys.argv[2] not in METHODS
+    ):
+        sys.exit("Usage: python sampling.py data.csv "
+                 "[likelihood|gibbs] [samples]")
+    people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) > 2 else "gibbs"
+    samples = int(sys.argv[3]) if len(sys.argv) > 3 else SAMPLES
+
+    probabilities, diagnostics = sample_probabilities(
+        people, method=method, samples=samples
+    )
+    print_probabilities(people, probabilities)
+    print(f"{method}: {diagnostics['chains']} chains of "
+          f"{diagnostics['samples']} samples")
+    if method == "gibbs":
+        print(f"  Largest R-hat: {diagnostics['max_rhat']:.4f}")
+    else:
+        print(f"  Largest standard error: "
+              f"{diagnostics['max_standard_error']:.4f}")
+    print(f"  Smallest effective sample size: {diagnostics['min_ess']:.0f}")
+
+
+class Pedigree():
+    """
+    Family from `load_data` in a form that is quick to sample from
+
+    People are numbered so parents come before their children, and their
+    genes and trait likelihoods are looked up in the tables precomputed
+    in `heredity` instead of being recomputed for every sample.
+    """
+
+    def __init__(self, people):
+        self.names = topological_order(people)
+        index = {name: i for i, name in enumerate(self.names)}
+        self.parents = [
+            (index[people[name]["mother"]], index[people[name]["father"]])
+            if people[name]["mother"] is not None else None
+            for name in self.names
+        ]
+        self.children = [[] for _ in self.names]
+        for i, parents in enumerate(self.parents):
+            if parents is not None:
+                for parent in parents:
+                    self.children[parent].append(i)
+
+        self.prior = PRIOR
+        self.inherit = INHERITANCE
+        self.likelihood = [
+            TRAIT_LIKELIHOOD[people[name]["trait"]] for name in self.names
+        ]
+
+    def __len__(self):
+        return len(self.names)
+
+    def local(self, i, genes):
+        """
+        Return the distribution of person i's genes given their parents'.
+        """
+        if self.parents[i] is None:
+            return self.prior
+        m, f = self.parents[i]
+        return [self.inherit[g][genes[m]][genes[f]] for g in GENES]
+
+    def forward(self, rng):
+        """
+        Return a tuple (genes, log weight) sampling everyone's genes from
+        their parents', with weight the likelihood of the known traits.
+        """
+        genes = [0] * len(self)
+        log_weight = 0
+        for i in range(len(self)):
+            g = choose(self.local(i, genes), rng.random())
+            genes[i] = g
+            log_weight += math.log(self.likelihood[i][g])
+        return genes, log_weight
+
+    def conditional(self, i, genes):
+        """
+        Return the distribution of person i's genes given everyone else's
+        genes and the known traits.
+        """
+        weights = self.local(i, genes)
+        weights = [weights[g] * self.likelihood[i][g] for g in GENES]
+        for child in self.children[i]:
+            m, f = self.parents[child]
+            table = self.inherit[genes[child]]
+            if m == i:
+                weights = [weights[g] * table[g][genes[f]] for g in GENES]
+            else:
+                weights = [weights[g] * table[genes[m]][g] for g in GENES]
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+
+def choose(distribution, u):
+    """
+    Return the gene count at which the cumulative `distribution` first
+    exceeds `u`, a uniform number in [0, 1).
+    """
+    if u < distribution[0]:
+        return 0
+    if u < distribution[0] + distribution[1]:
+        return 1
+    return 2
+
+
+def topological_order(people):
+    """
+    Return a list of names in which everyone comes after their parents.
+    """
+    order = []
+    seen = set()
+
+    def visit(name):
+        stack = [name]
+        while stack:
+            person = stack[-1]
+            parents = [
+                parent for parent in
+                (people[person]["mother"], people[person]["father"])
+                if parent is not None and parent not in seen
+            ]
+            if parents:
+                stack.extend(parents)
+                continue
+            stack.pop()
+            if person not in seen:
+                seen.add(person)
+                order.append(person)
+
+    for name in people:
+        visit(name)
+    return order
+
+
+def sample_probabilities(people, method="gibbs", samples=SAMPLES,
+                         chains=CHAINS, burn_in=BURN_IN, processes=None,
+                         seed=None):
+    """
+    Return a tuple (probabilities, diagnostics) estimating every person's
+    gene and trait distribution by sampling, in the same structure as
+    `probabilities` in `heredity.main`.
+
+    `method` is "likelihood" for likelihood weighting or "gibbs" for
+    Gibbs sampling. Each of `chains` independent chains draws `samples`
+    samples in a pool of worker processes, and their estimates are
+    averaged. `diagnostics` describes how far the chains can be trusted.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method}")
+    pedigree = Pedigree(people)
+    seeds = random.Random(seed).sample(range(1 << 30), chains)
+    jobs = [
+        (pedigree, method, samples, burn_in, chain_seed)
+        for chain_seed in seeds
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(run_chain, jobs)
+
+    # Average the gene distributions estimated by each chain
+    estimates = [result["genes"] for result in results]
+    probabilities = dict()
+    for i, name in enumerate(pedigree.names):
+        genes = {
+            g: sum(estimate[i][g] for estimate in estimates) / chains
+            for g in GENES
+        }
+        probabilities[name] = {
+            "gene": {2: genes[2], 1: genes[1], 0: genes[0]},
+            "trait": trait_distribution(people[name], genes),
+        }
+    probabilities = {name: probabilities[name] for name in people}
+
+    if method == "gibbs":
+        diagnostics = gibbs_diagnostics(pedigree, results, samples)
+    else:
+        diagnostics = likelihood_diagnostics(pedigree, results, samples)
+    diagnostics["method"] = method
+    return probabilities, diagnostics
+
+
+def run_chain(job):
+    """
+    Run one chain of a sampler and return a dictionary of its estimates.
+    """
+    pedigree, method, samples, burn_in, seed = job
+    rng = random.Random(seed)
+    if method == "gibbs":
+        return gibbs(pedigree, samples, burn_in, rng)
+    return likelihood_weighting(pedigree, samples, rng)
+
+
+def likelihood_weighting(pedigree, samples, rng):
+    """
+    Return a dictionary with the weighted gene distribution of each person
+    over `samples` forward samples, and the sums of the weights and of
+    their squares.
+
+    Weights are kept relative to the largest log weight seen so far, so
+    large families with many known traits do not underflow.
+    """
+    n = len(pedigree)
+    totals = [[0.0] * 3 for _ in range(n)]
+    weight_sum = 0.0
+    square_sum = 0.0
+    reference = None
+    for _ in range(samples):
+        genes, log_weight = pedigree.forward(rng)
+        if reference is None or log_weight > reference:
+            if reference is not None:
+                scale = math.exp(reference - log_weight)
+                for total in totals:
+                    for g in GENES:
+                        total[g] *= scale
+                weight_sum *= scale
+                square_sum *= scale ** 2
+            reference = log_weight
+        weight = math.exp(log_weight - reference)
+        for i, g in enumerate(genes):
+            totals[i][g] += weight
+        weight_sum += weight
+        square_sum += weight ** 2
+    return {
+        "genes": [[total[g] / weight_sum for g in GENES] for total in totals],
+        "weight_sum": weight_sum,
+        "square_sum": square_sum,
+    }
+
+
+def gibbs(pedigree, samples, burn_in, rng):
+    """
+    Return a dictionary with the gene distribution of each person over
+    `samples` Gibbs sweeps, after `burn_in` sweeps are discarded.
+
+    Each sweep resamples every person's genes given everyone else's. The
+    estimate averages each person's conditional distribution rather than
+    counting sampled values, which has lower variance. The expected gene
+    count of each person is also recorded in up to `BATCHES` batch means
+    of `batch_size` sweeps each, along with its sum and sum of squares,
+    for convergence diagnostics. Sweeps left over after the last full
+    batch count towards the estimate but not towards any batch.
+    """
+    n = len(pedigree)
+    genes, _ = pedigree.forward(rng)
+    for _ in range(burn_in):
+        for i in range(n):
+            genes[i] = choose(pedigree.conditional(i, genes), rng.random())
+
+    totals = [[0.0] * 3 for _ in range(n)]
+    sums = [0.0] * n
+    squares = [0.0] * n
+    count = max(min(BATCHES, samples), 1)
+    batch_size = max(samples // count, 1)
+    batches = [[0.0] * count for _ in range(n)]
+    for sweep in range(samples):
+        batch = sweep // batch_size
+        for i in range(n):
+            distribution = pedigree.conditional(i, genes)
+            total = totals[i]
+            for g in GENES:
+                total[g] += distribution[g]
+            expected = distribution[1] + 2 * distribution[2]
+            sums[i] += expected
+            squares[i] += expected ** 2
+            if batch < count:
+                batches[i][batch] += expected
+            genes[i] = choose(distribution, rng.random())
+
+    return {
+        "genes": [[total[g] / samples for g in GENES] for total in totals],
+        "sums": sums,
+        "squares": squares,
+        "batches": [
+            [value / batch_size for value in batch] for batch in batches
+        ],
+        "batch_size": batch_size,
+    }
+
+
+def gibbs_diagnostics(pedigree, results, samples):
+    """
+    Return the Gelman-Rubin potential scale reduction factor (R-hat) and
+    the effective sample size of each person's expected gene count.
+
+    R-hat compares the variance between chains with the variance within
+    them, and is close to 1 once chains started apart agree. The effective
+    sample size divides the variance of single sweeps by the variance of
+    batch means, which grows when successive sweeps are correlated.
+    """
+    chains = len(results)
+    rhat = dict()
+    ess = dict()
+    for i, name in enumerate(pedigree.names):
+        means = [result["sums"][i] / samples for result in results]
+        variances = [
+            max(result["squares"][i] / samples - mean ** 2, 0)
+            * samples / max(samples - 1, 1)
+            for result, mean in zip(results, means)
+        ]
+        within = sum(variances) / chains
+        overall = sum(means) / chains
+        between = (
+            sum((mean - overall) ** 2 for mean in means) / (chains - 1)
+            if chains > 1 else 0
+        )
+        if within > 0:
+            pooled = (samples - 1) / samples * within + between
+            rhat[name] = math.sqrt(pooled / within)
+        else:
+            rhat[name] = 1.0
+
+        # Variance of batch means times the batch size estimates the
+        # variance of the chain mean times the number of samples
+        scaled = []
+        for result in results:
+            batch = result["batches"][i]
+            if len(batch) > 1:
+                mean = sum(batch) / len(batch)
+                scaled.append(
+                    sum((value - mean) ** 2 for value in batch)
+                    / (len(batch) - 1) * result["batch_size"]
+                )
+        asymptotic = sum(scaled) / len(scaled) if scaled else 0
+        ess[name] = (
+            min(chains * samples * within / asymptotic, chains * samples)
+            if asymptotic > 0 and within > 0 else chains * samples
+        )
+
+    return {
+        "chains": chains,
+        "samples": samples,
+        "rhat": rhat,
+        "ess": ess,
+        "max_rhat": max(rhat.values(), default=1.0),
+        "min_ess": min(ess.values(), default=0),
+    }
+
+
+def likelihood_diagnostics(pedigree, results, samples):
+    """
+    Return the effective sample size of likelihood weighting and the
+    standard error of each person's expected gene count across chains.
+
+    The effective sample size (sum of weights)^2 / (sum of squared
+    weights) counts how many unweighted samples the weighted ones are
+    worth; it collapses when a few samples match the evidence far better
+    than the rest.
+    """
+    chains = len(results)
+    ess = sum(
+        result["weight_sum"] ** 2 / result["square_sum"] for result in results
+    )
+    error = dict()
+    for i, name in enumerate(pedigree.names):
+        means = [result["genes"][i][1] + 2 * result["genes"][i][2]
+                 for result in results]
+        overall = sum(means) / chains
+        error[name] = (
+            math.sqrt(sum((mean - overall) ** 2 for mean in means)
+                      / (chains - 1) / chains)
+            if chains > 1 else 0.0
+        )
+    return {
+        "chains": chains,
+        "samples": samples,
+        "standard_error": error,
+        "max_standard_error": max(error.values(), default=0.0),
+        "ess": ess,
+        "min_ess": ess,
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import sys
+
+import numpy as np
+
+from heredity import (
+    INHERITANCE, PRIOR, TRAIT_LIKELIHOOD, load_data, print_probabilities
+)
+
+# Gene assignments scored at once
+BATCH_SIZE = 1 << 16
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python vectorized.py data.csv")
+    people = load_data(sys.argv[1])
+    print_probabilities(people, enumerate_probabilities(people))
+
+
+def enumerate_probabilities(people, batch_size=BATCH_SIZE):
+    """
+    Return the gene and trait distribution of every person, in the same
+    structure as `probabilities` in `heredity.main`, by summing the joint
+    probability of every assignment of genes.
+
+    Assignments are numbered from 0 to 3^n - 1 and person i's gene count
+    is digit i of the number in base 3, so a batch of assignments is just
+    a range of integers. The joint probability of a whole batch is a
+    product of lookups into the inheritance and trait tables, and the
+    marginals are sums over the batch. People whose trait is unknown are
+    summed over analytically: their trait probabilities add up to 1 for
+    every gene count. This is exact for any pedigree, loops included, but
+    takes time exponential in the number of people.
+    """
+    names = list(people)
+    n = len(names)
+    index = {name: i for i, name in enumerate(names)}
+    inherit = np.array(INHERITANCE)
+    prior = np.array(PRIOR)
+    traits = [np.array(TRAIT_LIKELIHOOD[people[name]["trait"]])
+              for name in names]
+    parents = [
+        (index[people[name]["mother"]], index[people[name]["father"]])
+        if people[name]["mother"] is not None else None
+        for name in names
+    ]
+    present = np.array(TRAIT_LIKELIHOOD[True])
+    powers = 3 ** np.arange(n, dtype=np.int64)
+
+    genes_total = np.zeros((n, 3))
+    for start in range(0, 3 ** n, batch_size):
+        assignments = np.arange(start, min(start + batch_size, 3 ** n),
+                                dtype=np.int64)
+        genes = (assignments[:, None] // powers) % 3
+
+        # Joint probability of each assignment in the batch
+        p = np.ones(len(assignments))
+        for i in range(n):
+            if parents[i] is None:
+                p *= prior[genes[:, i]]
+            else:
+                m, f = parents[i]
+                p *= inherit[genes[:, i], genes[:, m], genes[:, f]]
+            p *= traits[i][genes[:, i]]
+
+        for i in range(n):
+            genes_total[i] += np.bincount(genes[:, i], weights=p,
+                                          minlength=3)
+
+    genes_total /= genes_total.sum(axis=1, keepdims=True)
+    probabilities = dict()
+    for i, name in enumerate(names):
+        distribution = genes_total[i]
+        trait = people[name]["trait"]
+        if trait is None:
+            true = float(distribution @ present)
+        else:
+            true = float(trait)
+        probabilities[name] = {
+            "gene": {g: float(distribution[g]) for g in (2, 1, 0)},
+            "trait": {True: true, False: 1 - true},
+        }
+    return probabilities
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from crawler import parallel_crawl
+from engine import METHODS, iterate, power_iteration, sample_surfers
+from graph import Graph
+from pagerank import DAMPING, crawl, iterate_pagerank, sample_pagerank
+
+# Largest corpus to write out as HTML files and crawl
+CRAWL_LIMIT = 20000
+
+# Largest corpus to run the original dictionary-based functions on
+DICT_LIMIT = 2000
+
+# Samples taken by each sampler
+SAMPLES = 10000
+VECTORIZED_SAMPLES = 10000000
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python benchmark.py size [size ...]")
+    for size in map(int, sys.argv[1:]):
+        corpus = preferential_attachment(size, seed=size)
+        print(f"{size} pages, {sum(len(links) for links in corpus.values())} "
+              f"links, {sum(not links for links in corpus.values())} "
+              f"without links")
+        print(f"  {'engine':<24}{'seconds':>10}{'peak MB':>10}{'L1 error':>12}")
+        for name, seconds, memory, error in benchmark(corpus):
+            error = f"{error:.2e}" if error is not None else "-"
+            print(f"  {name:<24}{seconds:>10.3f}{memory:>10.1f}{error:>12}")
+
+
+def preferential_attachment(n, links=5, dangling=0.1, seed=None):
+    """
+    Return a random corpus of `n` pages, in the form returned by `crawl`,
+    whose numbers of incoming links follow a power law.
+
+    Pages are added one at a time and link to up to `links` earlier pages,
+    each chosen with probability proportional to one more than its number
+    of incoming links. A fraction `dangling` of pages have no links.
+    """
+    rng = random.Random(seed)
+    names = [f"{i}.html" for i in range(n)]
+    corpus = {name: set() for name in names}
+
+    # Every page appears once, plus once more for each link to it
+    urn = []
+    for i in range(n):
+        if i and rng.random() >= dangling:
+            targets = {urn[rng.randrange(len(urn))]
+                       for _ in range(min(links, i))}
+            corpus[names[i]] = {names[target] for target in targets}
+            urn.extend(targets)
+        urn.append(i)
+    return corpus
+
+
+def write_corpus(corpus, directory):
+    """
+    Write a corpus out as HTML files in `directory` so it can be crawled.
+    """
+    for page, links in corpus.items():
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<head><title>{page}</title>"
+                    f"</head>\n<body>\n")
+            for link in sorted(links):
+                f.write(f'<a href="{link}">{link}</a>\n')
+            f.write("</body>\n</html>\n")
+
+
+def measure(function, *args, **kwargs):
+    """
+    Return a tuple (result, seconds, peak memory in MB) for a call.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 2 ** 20
+
+
+def benchmark(corpus):
+    """
+    Return a list of (name, seconds, peak memory in MB, L1 error) tuples
+    timing each way of crawling and ranking a corpus. Errors are measured
+    against power iteration run to a tolerance of 1e-12, and are None for
+    steps that do not rank pages.
+    """
+    results = []
+    graph = Graph.from_corpus(corpus)
+    reference = power_iteration(graph, DAMPING, tolerance=1e-12)
+
+    def error(ranks):
+        if isinstance(ranks, dict):
+            ranks = np.array([ranks.get(name, 0) for name in graph.names])
+        return float(np.abs(ranks - reference).sum())
+
+    if len(corpus) <= CRAWL_LIMIT:
+        with tempfile.TemporaryDirectory() as directory:
+            write_corpus(corpus, directory)
+            _, seconds, memory = measure(crawl, directory)
+            results.append(("crawl", seconds, memory, None))
+            _, seconds, memory = measure(parallel_crawl, directory, cache=None)
+            results.append(("parallel_crawl", seconds, memory, None))
+
+    if len(corpus) <= DICT_LIMIT:
+        ranks, seconds, memory = measure(sample_pagerank, corpus, DAMPING,
+                                         SAMPLES)
+        results.append(("sample_pagerank", seconds, memory, error(ranks)))
+        ranks, seconds, memory = measure(iterate_pagerank, corpus, DAMPING)
+        results.append(("iterate_pagerank", seconds, memory, error(ranks)))
+
+    ranks, seconds, memory = measure(sample_surfers, graph, DAMPING,
+                                     VECTORIZED_SAMPLES, seed=0)
+    results.append(("sample_surfers", seconds, memory, error(ranks)))
+    for method in METHODS:
+        (ranks, _), seconds, memory = measure(iterate, graph, DAMPING, method)
+        results.append((f"iterate {method}", seconds, memory, error(ranks)))
+    return results
+
+
+if __name__ == "__main__":
+    main()
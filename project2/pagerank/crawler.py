@@ -0,0 +1,132 @@
+import gzip
+import multiprocessing
+import os
+import re
+import sys
+
+# Characters read from a page at a time, and longest tag kept across reads
+CHUNK_SIZE = 1 << 16
+MAX_TAG = 1 << 12
+
+# Name of the file, inside the corpus directory, that remembers past crawls
+CACHE = ".crawl.tsv.gz"
+
+# Fewest pages to parse that are worth starting a process pool for
+POOL_THRESHOLD = 64
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python crawler.py corpus")
+    corpus = parallel_crawl(sys.argv[1])
+    links = sum(len(corpus[page]) for page in corpus)
+    print(f"Crawled {len(corpus)} pages with {links} links")
+
+
+def parallel_crawl(directory, cache=CACHE, processes=None):
+    """
+    Parse a directory of HTML pages and check for links to other pages,
+    returning the same dictionary as `crawl`.
+
+    Pages are parsed in a process pool, reading each file in chunks, unless
+    there are fewer than `POOL_THRESHOLD` of them to parse.
+    The links found on each page are saved to `cache` inside the
+    directory, and pages whose modification time and size are unchanged
+    since the last crawl are not read again. Pass None to disable caching.
+    """
+    path = os.path.join(directory, cache) if cache else None
+    previous = load_cache(path) if path else dict()
+
+    # Decide which pages need parsing
+    pages = dict()
+    stale = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".html") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if entry.name in previous and previous[entry.name][0] == stamp:
+                pages[entry.name] = previous[entry.name]
+            else:
+                stale.append((entry.path, stamp))
+
+    if len(stale) >= POOL_THRESHOLD:
+        with multiprocessing.Pool(processes) as pool:
+            for name, stamp, links in pool.imap_unordered(
+                parse_page, stale, chunksize=64
+            ):
+                pages[name] = (stamp, links)
+    else:
+        for name, stamp, links in map(parse_page, stale):
+            pages[name] = (stamp, links)
+
+    # The cache is only an optimization, so a read-only corpus is fine
+    if path:
+        try:
+            save_cache(path, pages)
+        except OSError:
+            pass
+
+    # Only include links to other pages in the corpus
+    return {
+        name: set(link for link in links if link in pages and link != name)
+        for name, (_, links) in pages.items()
+    }
+
+
+def parse_page(job):
+    """
+    Return a tuple (name, stamp, links) for a page, reading the file in
+    chunks of `CHUNK_SIZE` bytes rather than all at once.
+    """
+    path, stamp = job
+    links = set()
+    carry = ""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            text = carry + chunk
+
+            # A tag cut off at the end of the chunk is kept for the next one
+            cut = text.rfind("<")
+            if cut == -1 or len(text) - cut > MAX_TAG:
+                cut = len(text)
+            links.update(LINK.findall(text, 0, cut))
+            carry = text[cut:]
+    links.update(LINK.findall(carry))
+    return os.path.basename(path), stamp, links
+
+
+def load_cache(path):
+    """
+    Return a dictionary mapping page names to (stamp, links) from a cache
+    file, or an empty dictionary if there is none.
+    """
+    pages = dict()
+    if not os.path.exists(path):
+        return pages
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            name, mtime, size, *links = line.rstrip("\n").split("\t")
+            pages[name] = ((int(mtime), int(size)), set(links))
+    return pages
+
+
+def save_cache(path, pages):
+    """
+    Write the links found on each page to a cache file, one page per line:
+    name, modification time, size, and then every link, separated by tabs.
+    """
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for name, ((mtime, size), links) in sorted(pages.items()):
+            f.write("\t".join([name, str(mtime), str(size), *sorted(links)]))
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg
+
+from graph import Graph, load_graph
+
+# Default stopping rule: total absolute change in ranks between iterations
+TOLERANCE = 1e-10
+MAX_ITERATIONS = 1000
+
+# Iteration methods, and how often extrapolating methods extrapolate
+METHODS = ["jacobi", "gauss-seidel", "aitken", "quadratic"]
+EXTRAPOLATION_PERIOD = 10
+
+# Default number of random surfers moved together, and steps not counted
+SURFERS = 100000
+BURN_IN = 20
+
+DAMPING = 0.85
+SAMPLES = 10000000
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python engine.py corpus")
+    graph = load_graph(sys.argv[1])
+    ranks = graph.ranks(sample_surfers(graph, DAMPING, SAMPLES))
+    print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+    ranks = graph.ranks(power_iteration(graph, DAMPING))
+    print(f"PageRank Results from Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+def sparse_pagerank(corpus, damping_factor, tolerance=TOLERANCE):
+    """
+    Return PageRank values for each page of a corpus, as returned by
+    `crawl`, computed by power iteration over a sparse matrix.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values sum to 1.
+    """
+    graph = Graph.from_corpus(corpus)
+    return graph.ranks(power_iteration(graph, damping_factor, tolerance))
+
+
+def transition_matrix(graph):
+    """
+    Return a tuple (matrix, dangling) for a graph.
+
+    `matrix` is a column-stochastic CSR matrix where entry (j, i) is the
+    probability of following a link from page i to page j, and `dangling`
+    is a boolean array marking pages with no links, whose columns are
+    empty. A surfer on a dangling page moves to any page with equal
+    probability.
+    """
+    n = len(graph)
+    degrees = graph.out_degrees()
+    sources = graph.sources()
+    matrix = sparse.csr_matrix(
+        (1 / degrees[sources], (graph.targets, sources)), shape=(n, n)
+    )
+    return matrix, degrees == 0
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, teleport=None):
+    """
+    Return the PageRank vector of a graph, starting from the uniform
+    distribution and iterating until the ranks change by less than
+    `tolerance` in total.
+
+    `teleport` is an optional vector summing to 1 giving the probability
+    of jumping to each page, in place of the uniform distribution, both
+    for random jumps and from pages with no links.
+    """
+    ranks, _ = iterate(graph, damping_factor, "jacobi", tolerance,
+                       max_iterations, teleport)
+    return ranks
+
+
+def iterate(graph, damping_factor, method="jacobi", tolerance=TOLERANCE,
+            max_iterations=MAX_ITERATIONS, teleport=None):
+    """
+    Return a tuple (ranks, history) computing the PageRank vector of a
+    graph with one of the `METHODS`.
+
+    Every method stops once the L1 residual, the total change one plain
+    PageRank update would make to the ranks, is below `tolerance`.
+    `history` has a dictionary for each iteration with its number, the
+    residual, the seconds elapsed since the start, and whether the ranks
+    were extrapolated on that iteration.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method}")
+    n = len(graph)
+    matrix, dangling = transition_matrix(graph)
+    if teleport is None:
+        teleport = np.full(n, 1 / n)
+
+    def update(ranks):
+        """Return the ranks after one plain PageRank update."""
+        updated = damping_factor * (
+            matrix @ ranks + ranks[dangling].sum() * teleport
+        )
+        return updated + (1 - damping_factor) * teleport
+
+    if method == "gauss-seidel":
+        # Pages with no links leading nowhere only changes the scale of the
+        # solution y of y = d M y + (1 - d) t, so each sweep solves
+        # (I - d L) y = d U y + (1 - d) t, where L and U are the parts of
+        # the matrix below and on or above the diagonal, and the ranks are
+        # y scaled to sum to 1
+        values = np.full(n, 1 / n)
+        lower = sparse.identity(n, format="csr") - damping_factor * sparse.tril(
+            matrix, k=-1, format="csr"
+        )
+        upper = sparse.triu(matrix, format="csr")
+
+    start = time.perf_counter()
+    history = []
+    previous = []
+    ranks = np.full(n, 1 / n)
+    for iteration in range(1, max_iterations + 1):
+        updated = update(ranks)
+        residual = np.abs(updated - ranks).sum()
+        extrapolated = False
+
+        if residual < tolerance:
+            ranks = updated
+        elif method == "gauss-seidel":
+            values = linalg.spsolve_triangular(
+                lower,
+                damping_factor * (upper @ values) + (1 - damping_factor) * teleport,
+                lower=True, unit_diagonal=True
+            )
+            ranks = values / values.sum()
+        else:
+            ranks = updated
+            previous = (previous + [ranks])[-4:]
+            if method != "jacobi" and iteration % EXTRAPOLATION_PERIOD == 0:
+                extrapolate = aitken if method == "aitken" else quadratic
+                if len(previous) >= (3 if method == "aitken" else 4):
+                    ranks = extrapolate(previous)
+                    previous = []
+                    extrapolated = True
+
+        history.append({
+            "iteration": iteration,
+            "residual": float(residual),
+            "seconds": time.perf_counter() - start,
+            "extrapolated": extrapolated,
+        })
+        if residual < tolerance:
+            break
+    return ranks, history
+
+
+def aitken(iterates):
+    """
+    Return the Aitken extrapolation of the last three iterates.
+    """
+    x0, x1, x2 = iterates[-3:]
+    second = x2 - 2 * x1 + x0
+    safe = np.abs(second) > 1e-300
+    result = x2.copy()
+    result[safe] = x0[safe] - (x1[safe] - x0[safe]) ** 2 / second[safe]
+    return normalize(result, x2)
+
+
+def quadratic(iterates):
+    """
+    Return the quadratic extrapolation of the last four iterates, which
+    assumes they are mostly made of the PageRank vector and the two
+    slowest decaying eigenvectors.
+    """
+    x0, x1, x2, x3 = iterates[-4:]
+    y = np.column_stack([x1 - x0, x2 - x0])
+    gamma, *_ = np.linalg.lstsq(y, -(x3 - x0), rcond=None)
+    g1, g2, g3 = gamma[0], gamma[1], 1
+    result = (g1 + g2 + g3) * x1 + (g2 + g3) * x2 + g3 * x3
+    return normalize(result, x3)
+
+
+def normalize(ranks, fallback):
+    """
+    Return `ranks` clipped to be non-negative and scaled to sum to 1, or
+    `fallback` if nothing is left.
+    """
+    ranks = np.maximum(ranks, 0)
+    total = ranks.sum()
+    if not np.isfinite(total) or total <= 0:
+        return fallback
+    return ranks / total
+
+
+def compare_methods(graph, damping_factor, tolerance=TOLERANCE):
+    """
+    Return a dictionary mapping each of the `METHODS` to a tuple of the
+    iterations, seconds and final residual it took to converge.
+    """
+    results = dict()
+    for method in METHODS:
+        _, history = iterate(graph, damping_factor, method, tolerance)
+        last = history[-1]
+        results[method] = (last["iteration"], last["seconds"],
+                           last["residual"])
+    return results
+
+
+def vectorized_sample_pagerank(corpus, damping_factor, n, surfers=SURFERS,
+                               seed=None):
+    """
+    Return PageRank values for each page of a corpus, as returned by
+    `crawl`, estimated from `n` samples taken by many random surfers at once.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values sum to 1.
+    """
+    graph = Graph.from_corpus(corpus)
+    return graph.ranks(sample_surfers(graph, damping_factor, n, surfers, seed))
+
+
+def sample_surfers(graph, damping_factor, n, surfers=SURFERS, seed=None,
+                   burn_in=BURN_IN):
+    """
+    Return a vector of PageRank values estimated from `n` samples.
+
+    `surfers` independent random surfers start on uniformly random pages
+    and move in lockstep, each step drawing every surfer's next page with
+    a few array operations: with probability `damping_factor` a surfer
+    follows a uniformly chosen link, read directly from the CSR arrays,
+    and otherwise (or on a page with no links) jumps to a random page.
+    The first `burn_in` steps are not counted.
+    """
+    rng = np.random.default_rng(seed)
+    size = len(graph)
+    degrees = graph.out_degrees()
+    surfers = max(1, min(surfers, n))
+    positions = rng.integers(size, size=surfers)
+    counts = np.zeros(size, dtype=np.int64)
+
+    taken = -burn_in * surfers
+    while taken < n:
+        if taken >= 0:
+            counted = positions[:n - taken]
+            counts += np.bincount(counted, minlength=size)
+        taken += surfers
+
+        # move every surfer one step
+        degree = degrees[positions]
+        follow = (rng.random(surfers) < damping_factor) & (degree > 0)
+        choice = (rng.random(surfers) * degree).astype(np.int64)
+        moved = rng.integers(size, size=surfers)
+        moved[follow] = graph.targets[
+            graph.offsets[positions[follow]] + choice[follow]
+        ]
+        positions = moved
+
+    return counts / n
+
+
+def sampling_error(sampled, reference):
+    """
+    Return a tuple (l1, largest) of the total and largest absolute
+    difference between two rank vectors.
+    """
+    difference = np.abs(np.asarray(sampled) - np.asarray(reference))
+    return float(difference.sum()), float(difference.max())
+
+
+def sampling_convergence(graph, damping_factor, sizes, surfers=SURFERS,
+                         seed=None):
+    """
+    Return a list of (samples, l1 error, largest error, samples per second)
+    tuples comparing `sample_surfers` with `power_iteration` for each
+    number of samples in `sizes`.
+    """
+    reference = power_iteration(graph, damping_factor)
+    results = []
+    for n in sizes:
+        start = time.perf_counter()
+        sampled = sample_surfers(graph, damping_factor, n, surfers, seed)
+        seconds = time.perf_counter() - start
+        l1, largest = sampling_error(sampled, reference)
+        results.append((n, l1, largest, n / seconds if seconds else 0))
+    return results
+
+
+if __name__ == "__main__":
+    main()
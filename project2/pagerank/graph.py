@@ -0,0 +1,176 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from crawler import parallel_crawl
+
+# Binary graph file format: a header of MAGIC and three little-endian
+# uint64 values (pages, links, bytes of names), then the int64 offsets,
+# the int32 targets, and the page names as UTF-8 separated by newlines
+MAGIC = b"PRGRAPH1"
+HEADER = np.dtype([("magic", "S8"), ("pages", "<u8"), ("links", "<u8"),
+                   ("names", "<u8")])
+
+# Name of the graph file saved inside a corpus directory
+GRAPH_FILE = ".pagerank.graph"
+
+
+class Graph():
+    """
+    Link graph in compressed sparse row form
+
+    Pages are numbered by their position in `names`. The pages linked to
+    by page i are `targets[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, names, offsets, targets):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Return a graph for a corpus as returned by `crawl`, a dictionary
+        mapping each page to the set of pages it links to.
+        """
+        names = sorted(corpus)
+        index = {name: i for i, name in enumerate(names)}
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        targets = []
+        for i, name in enumerate(names):
+            links = sorted(index[link] for link in corpus[name])
+            targets.extend(links)
+            offsets[i + 1] = offsets[i] + len(links)
+        return cls(names, offsets, targets)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Return a graph read from a file written by `save`.
+
+        If `mmap` is True the offset and target arrays are memory-mapped
+        rather than read, so only the parts that are used are paged in.
+        """
+        header = np.fromfile(path, dtype=HEADER, count=1)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a graph file")
+        pages, links = int(header["pages"]), int(header["links"])
+        start = HEADER.itemsize
+        end = start + 8 * (pages + 1)
+        if mmap:
+            offsets = np.memmap(path, dtype="<i8", mode="r", offset=start,
+                                shape=(pages + 1,))
+            targets = np.memmap(path, dtype="<i4", mode="r", offset=end,
+                                shape=(links,)) if links else np.zeros(0, "<i4")
+        else:
+            with open(path, "rb") as f:
+                f.seek(start)
+                offsets = np.fromfile(f, dtype="<i8", count=pages + 1)
+                targets = np.fromfile(f, dtype="<i4", count=links)
+        with open(path, "rb") as f:
+            f.seek(end + 4 * links)
+            names = f.read(int(header["names"])).decode("utf-8")
+        graph = cls.__new__(cls)
+        graph.names = names.split("\n") if pages else []
+        graph.index = {name: i for i, name in enumerate(graph.names)}
+        graph.offsets = offsets
+        graph.targets = targets
+        return graph
+
+    def save(self, path):
+        """
+        Write the graph to a binary file that `load` can memory-map.
+
+        The graph is written to a temporary file in the same directory
+        and then renamed over `path`, so graphs that still have the old
+        file memory-mapped keep reading the old contents.
+        """
+        names = "\n".join(self.names).encode("utf-8")
+        header = np.array(
+            [(MAGIC, len(self), len(self.targets), len(names))], dtype=HEADER
+        )
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                header.tofile(f)
+                np.asarray(self.offsets, dtype="<i8").tofile(f)
+                np.asarray(self.targets, dtype="<i4").tofile(f)
+                f.write(names)
+            # mkstemp makes the file private, but the graph may be shared
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temporary, 0o666 & ~umask)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def to_corpus(self):
+        """
+        Return the graph as a dictionary in the form returned by `crawl`.
+        """
+        return {
+            name: {self.names[j] for j in self.links(i)}
+            for i, name in enumerate(self.names)
+        }
+
+    def links(self, i):
+        """Return the array of pages linked to by page i."""
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def out_degrees(self):
+        """Return the array of the number of links on each page."""
+        return np.diff(self.offsets)
+
+    def sources(self):
+        """Return the array of the page each link starts from."""
+        return np.repeat(np.arange(len(self), dtype=np.int32),
+                         self.out_degrees())
+
+    def ranks(self, vector):
+        """Return a rank vector as a dictionary from page name to rank."""
+        return {name: float(vector[i]) for i, name in enumerate(self.names)}
+
+
+def load_graph(directory, mmap=True):
+    """
+    Return the graph of a directory of HTML pages.
+
+    The graph is saved to `GRAPH_FILE` inside the directory after the
+    pages are crawled, and later calls load it from there instead,
+    unless a page has been added, removed or modified since. Only the
+    pages themselves are compared, since saving the graph also changes
+    the directory. If the directory is read-only the graph is crawled
+    and returned without being saved.
+    """
+    path = os.path.join(directory, GRAPH_FILE)
+    if os.path.exists(path):
+        saved = os.stat(path).st_mtime_ns
+        pages = dict()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".html") and entry.is_file():
+                    pages[entry.name] = entry.stat().st_mtime_ns
+        graph = Graph.load(path, mmap=mmap)
+        if (set(pages) == set(graph.names)
+                and all(mtime <= saved for mtime in pages.values())):
+            return graph
+
+    # Date the graph from the start of the crawl, so pages changed while
+    # it runs are crawled again next time
+    start = time.time_ns()
+    graph = Graph.from_corpus(parallel_crawl(directory))
+    try:
+        graph.save(path)
+        os.utime(path, ns=(start, start))
+    except OSError:
+        return graph
+    return Graph.load(path, mmap=mmap)
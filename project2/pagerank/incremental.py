@@ -0,0 +1,110 @@
+import collections
+import math
+
+import numpy as np
+
+from engine import TOLERANCE
+from graph import Graph
+
+
+def incremental_pagerank(old_corpus, old_ranks, corpus, damping_factor,
+                         tolerance=TOLERANCE):
+    """
+    Return a tuple (ranks, report) updating PageRank values after a corpus
+    changes, instead of recomputing them from the uniform distribution.
+
+    `old_ranks` must be the converged PageRank values of `old_corpus`, as
+    returned by `sparse_pagerank`. Both corpora are dictionaries as
+    returned by `crawl`. `ranks` maps each page of `corpus` to its new
+    PageRank value and `report` describes the work done compared to a
+    full recompute.
+
+    PageRank is proportional to the solution y of y = d * P * y + (1 - d),
+    where P follows links and pages without links lead nowhere. The old
+    ranks, rescaled, solve this for the old corpus, so only pages that
+    were added, removed or had their links edited leave a residual.
+    Residuals above a threshold are pushed along each page's links in
+    first-in first-out order (a Gauss-Southwell style relaxation) until
+    the residuals add up to less than `tolerance` of the ranks.
+    """
+    graph = Graph.from_corpus(corpus)
+    n = len(graph)
+
+    # Rescale the old ranks to the unnormalized solution y
+    dangling = sum(old_ranks[page] for page in old_corpus
+                   if not old_corpus[page])
+    scale = (len(old_corpus) * (1 - damping_factor)
+             / (1 - damping_factor * (1 - dangling)))
+    values = np.zeros(n)
+    for page, rank in old_ranks.items():
+        if page in graph.index:
+            values[graph.index[page]] = rank * scale
+
+    # Residuals only come from pages whose links changed
+    residuals = np.zeros(n)
+    changed = [
+        page for page in set(corpus) | set(old_corpus)
+        if corpus.get(page) != old_corpus.get(page)
+    ]
+    for page in changed:
+        value = old_ranks.get(page, 0) * scale
+        if page not in old_corpus:
+            residuals[graph.index[page]] += 1 - damping_factor
+        old_links = old_corpus.get(page, set())
+        for link in old_links:
+            if link in graph.index:
+                residuals[graph.index[link]] -= (
+                    damping_factor * value / len(old_links)
+                )
+        new_links = corpus.get(page, set())
+        for link in new_links:
+            residuals[graph.index[link]] += (
+                damping_factor * value / len(new_links)
+            )
+
+    # Push residuals until all are small enough that the
+    # normalized ranks are within `tolerance` in total
+    threshold = tolerance * (1 - damping_factor) * max(values.sum(), 1) / n
+    queue = collections.deque(
+        np.flatnonzero(np.abs(residuals) > threshold).tolist()
+    )
+    queued = set(queue)
+
+    # Plain lists are much faster than arrays for one element at a time
+    residuals = residuals.tolist()
+    values = values.tolist()
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    pushes = 0
+    edges = 0
+    while queue:
+        i = queue.popleft()
+        queued.discard(i)
+        residual = residuals[i]
+        values[i] += residual
+        residuals[i] = 0
+        pushes += 1
+        start, end = offsets[i], offsets[i + 1]
+        if start == end:
+            continue
+        share = damping_factor * residual / (end - start)
+        for j in targets[start:end]:
+            residuals[j] += share
+            if j not in queued and abs(residuals[j]) > threshold:
+                queued.add(j)
+                queue.append(j)
+        edges += end - start
+    values = np.array(values)
+
+    # A full recompute touches every page and link on every iteration
+    iterations = math.ceil(math.log(tolerance) / math.log(damping_factor))
+    full = iterations * (n + len(graph.targets))
+    report = {
+        "changed_pages": len(changed),
+        "pushes": pushes,
+        "edges_touched": edges,
+        "work": pushes + edges,
+        "full_recompute_work": full,
+        "work_saved": 1 - (pushes + edges) / full,
+    }
+    return graph.ranks(values / values.sum()), report
@@ -11,7 +11,16 @@ SAMPLES = 10000
 def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+
+    # Reuse the memory-mapped graph saved by an earlier run if NumPy and
+    # SciPy are installed, otherwise crawl every page again
+    try:
+        import engine
+        from graph import load_graph
+    except ImportError:
+        corpus = crawl(sys.argv[1])
+    else:
+        corpus = load_graph(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
@@ -85,7 +94,14 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `corpus` may also be a `graph.Graph`, which is sampled from its link
+    arrays without building a dictionary of links.
     """
+    if not isinstance(corpus, dict):
+        from engine import sample_surfers
+        return corpus.ranks(sample_surfers(corpus, damping_factor, n))
+
     # randomly sample first page
     sample_prev = random.choice(list(corpus.keys()))
     probs = {sample_prev: 1}
@@ -118,7 +134,14 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `corpus` may also be a `graph.Graph`, which is iterated on its link
+    arrays without building a dictionary of links.
     """
+    if not isinstance(corpus, dict):
+        from engine import power_iteration
+        return corpus.ranks(power_iteration(corpus, damping_factor))
+
     # assign a starting rank
     ranks = {key: 1 / len(corpus) for key in corpus.keys()}
 
@@ -9,11 +9,54 @@ class CrosswordCreator():
         Create new CSP crossword generate.
         """
         self.crossword = crossword
+
+        # Number every word; sets of words are bitsets over these numbers
+        self.words = sorted(self.crossword.words)
+        self.all_words = (1 << len(self.words)) - 1
+
+        # Map from each length to the bitset of words of that length, and
+        # from (length, position) to a dictionary mapping each letter to
+        # the bitset of words of that length with that letter there
+        self.lengths = dict()
+        self.index = dict()
+        for number, word in enumerate(self.words):
+            bit = 1 << number
+            self.lengths[len(word)] = self.lengths.get(len(word), 0) | bit
+            for position, letter in enumerate(word):
+                letters = self.index.setdefault((len(word), position), dict())
+                letters[letter] = letters.get(letter, 0) | bit
+
         self.domains = {
-            var: self.crossword.words.copy()
+            var: self.all_words
             for var in self.crossword.variables
         }
 
+    def domain_words(self, var):
+        """
+        Return the list of words in the domain of `var`, in index order.
+        """
+        bits = bin(self.domains[var])[:1:-1]
+        words = []
+        number = bits.find("1")
+        while number != -1:
+            words.append(self.words[number])
+            number = bits.find("1", number + 1)
+        return words
+
+    def matching(self, length, position, domain):
+        """
+        Return the bitset of words of `length` that agree, at `position`,
+        with a letter some word in `domain` has at its overlapping position.
+        `domain` is a dictionary mapping letters to bitsets of words
+        with that letter there, restricted to the other variable's domain.
+        """
+        letters = self.index.get((length, position), dict())
+        allowed = 0
+        for letter, bits in domain.items():
+            if bits and letter in letters:
+                allowed |= letters[letter]
+        return allowed
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -98,10 +141,8 @@ class CrosswordCreator():
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
         """
-        for domain in self.domains:
-            for word in self.domains[domain].copy():
-                if len(word) != domain.length:
-                    self.domains[domain].remove(word)
+        for var in self.domains:
+            self.domains[var] &= self.lengths.get(var.length, 0)
 
 
     def revise(self, x, y):
@@ -113,21 +154,26 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        revised = False
         overlaps = self.crossword.overlaps[x, y]
+        if not overlaps:
+            return False
+
+        # letters y's words can have at the overlap, as bitsets of y's words
+        y_letters = {
+            letter: bits & self.domains[y]
+            for letter, bits in self.index.get(
+                (y.length, overlaps[1]), dict()
+            ).items()
+        }
 
-        if overlaps:
-            for word_x in self.domains[x].copy():
-                y_chars = []
-                x_char = word_x[overlaps[0]]
-                # get all possible letters for y
-                for word_y in self.domains[y]:
-                    y_chars.append(word_y[overlaps[1]])
-                # if x leaves no option for y, remove it
-                if x_char not in y_chars:
-                    self.domains[x].remove(word_x)
-                    revised = True
-        return revised
+        # keep only x's words with one of those letters at the overlap
+        revised = self.domains[x] & self.matching(
+            x.length, overlaps[0], y_letters
+        )
+        if revised == self.domains[x]:
+            return False
+        self.domains[x] = revised
+        return True
 
 
     def ac3(self, arcs=None):
@@ -150,7 +196,7 @@ class CrosswordCreator():
             x, y = arcs.pop(0)
             # if domains were revised
             if self.revise(x, y):
-                if len(self.domains[x]) == 0:
+                if not self.domains[x]:
                     return False
                 # add possibly affected arcs
                 for z in self.crossword.neighbors(x):
@@ -200,26 +246,24 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        print(var)
-        print(self.domains)
         eliminated = {}
         # test each word
-        for word in self.domains[var]:
+        for word in self.domain_words(var):
             count = 0
             # test how the word affects neighbors
             for neighbor in self.crossword.neighbors(var):
                 if neighbor not in assignment:
                     overlap = self.crossword.overlaps[var, neighbor]
-                    ndomain = self.domains[neighbor].copy()
+                    ndomain = self.domains[neighbor]
                     # count how many words would be removed
-                    for word_n in ndomain:
-                        if word[overlap[0]] != word_n[overlap[1]]:
-                            count += 1
+                    letters = self.index.get(
+                        (neighbor.length, overlap[1]), dict()
+                    )
+                    kept = ndomain & letters.get(word[overlap[0]], 0)
+                    count += ndomain.bit_count() - kept.bit_count()
             eliminated[word] = count
         # sort
         words = list(eliminated.keys())
-        print(sorted(words, key=lambda word: eliminated[word]))
-        print("-----")
         return sorted(words, key=lambda word: eliminated[word])
 
 
@@ -236,7 +280,7 @@ class CrosswordCreator():
         keys = {}
         # create dict of variables and their domain size and degree
         for var in unassigned:
-            var_remaining = len(self.domains[var])
+            var_remaining = self.domains[var].bit_count()
             var_degree = len(self.crossword.neighbors(var))
             keys[var] = (var_remaining, var_degree)
         # sort by domain size then largest degree